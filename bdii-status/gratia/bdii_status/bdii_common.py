@@ -4,6 +4,7 @@ import re
 import sys
 import logging
 import optparse
+import threading
 import logging.handlers
 
 default_bdii = 'ldap://is.grid.iu.edu:2170'
@@ -149,41 +150,45 @@ class LdapData:
                 return False
         return True
 
-def read_ldap(fp, multi=False):
+def iter_ldap(fp, multi=False):
     """
-    Convert a file stream into LDAP entries.
+    Convert a file stream into LDAP entries, one at a time.
 
     @param fp: Input stream containing LDIF data.
     @type fp: File-like object
     @keyword multi: If True, then the resulting LdapData objects can have
         multiple values per GLUE attribute.
-    @returns: List containing one LdapData object per LDIF entry.
+    @returns: Generator yielding one LdapData object per LDIF entry, as soon as
+        the entry is read.
     """
-    entry_started = False
-    mybuffer = ''
-    entries = []
-    counter = 0
-    for origline in fp.readlines():
-        counter += 1
+    lines = []
+    for origline in fp:
         line = origline.strip()
-        if len(line) == 0 and entry_started == True:
-            entries.append(LdapData(mybuffer[1:], multi=multi))
-            entry_started = False
-            mybuffer = ''
-        elif len(line) == 0 and entry_started == False:
-            pass
-        else: # len(line) > 0
-            if not entry_started:
-                entry_started = True
-            if origline.startswith(' '):
-                mybuffer += origline[1:-1]
-            else:
-                mybuffer += '\n' + line
+        if len(line) == 0:
+            if lines:
+                yield LdapData('\n'.join(lines), multi=multi)
+                lines = []
+        elif origline.startswith(' ') and lines:
+            # continuation of the previous line
+            lines[-1] += origline[1:].rstrip('\n')
+        else:
+            lines.append(line)
     #Catch the case where we started the entry and got to the end of the file
     #stream
-    if entry_started == True:
-        entries.append(LdapData(mybuffer[1:], multi=multi))
-    return entries
+    if lines:
+        yield LdapData('\n'.join(lines), multi=multi)
+
+def read_ldap(fp, multi=False):
+    """
+    Convert a file stream into LDAP entries.
+
+    @param fp: Input stream containing LDIF data.
+    @type fp: File-like object
+    @keyword multi: If True, then the resulting LdapData objects can have
+        multiple values per GLUE attribute.
+    @returns: List containing one LdapData object per LDIF entry.
+    """
+    return list(iter_ldap(fp, multi=multi))
 
 def query_bdii(cp, query="(objectClass=GlueCE)", binding="o=grid"):
     endpoint = cp.get('bdii', 'endpoint')
@@ -215,6 +220,39 @@ def read_bdii(cp, query="", binding="o=grid", multi=False):
     fp = query_bdii(cp, query=query, binding=binding)
     return read_ldap(fp, multi=multi)
 
+def read_bdii_many(cp, queries, binding="o=grid"):
+    """
+    Query a BDII instance with several queries at the same time (one
+    ldapsearch process and one thread per query), then parse the results.
+
+    @param cp: Site configuration; see L{query_bdii}
+    @type cp: ConfigParser
+    @param queries: List of (query, multi) tuples; see L{read_bdii}
+    @keyword binding: Base DN to query on.
+    @returns: List with the results of the queries, in the same order as
+        queries; each one is a list of LdapData objects.
+    """
+    results = [None] * len(queries)
+    errors = []
+    def run_query(idx, query, multi):
+        try:
+            results[idx] = read_bdii(cp, query=query, binding=binding,
+                multi=multi)
+        except Exception:
+            errors.append(sys.exc_info())
+    threads = []
+    for idx, (query, multi) in enumerate(queries):
+        thread = threading.Thread(target=run_query, args=(idx, query, multi))
+        thread.setDaemon(True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    if errors:
+        exc_type, exc_value, exc_traceback = errors[0]
+        raise exc_type, exc_value, exc_traceback
+    return results
+
 def normalizeDN(dn_tuple):
     """
     Normalize a DN; because there are so many problems with mds-vo-name
@@ -227,32 +265,50 @@ def normalizeDN(dn_tuple):
             return dn[:-1]
         dn += entry + ','
 
+def index_FK(join_list, join_attr):
+    """
+    Index a list of LdapData objects for L{join_FK}.
+
+    @param join_list: List of LdapData objects.
+    @param join_attr: GLUE attribute (without the "Glue" prefix) referenced
+        by the foreign keys.
+    @returns: Dictionary mapping the foreign key values ("Glue<attr>=<value>")
+        to the first entry of join_list with that value.
+    """
+    index = {}
+    prefix = "Glue%s=" % join_attr
+    for entry in join_list:
+        try:
+            vals = entry.glue[join_attr]
+        except KeyError:
+            continue
+        if not entry.multi:
+            vals = [vals]
+        for val in vals:
+            index.setdefault(prefix + val, entry)
+    return index
+
 def join_FK(item, join_list, join_attr, join_fk_name="ForeignKey"):
+    """
+    Find the entry referenced by the foreign key(s) of item.
+
+    @param join_list: List of LdapData objects, or the index built by
+        L{index_FK}; build the index once when joining many items.
+    @returns: The first matching entry; raises ValueError if there is none.
+    """
+    if isinstance(join_list, dict):
+        index = join_list
+    else:
+        index = index_FK(join_list, join_attr)
     if item.multi:
         item_fks = item.glue[join_fk_name]
-        for item_fk in item_fks:
-            for entry in join_list:
-                if entry.multi:
-                    for val in entry.glue[join_attr]:
-                        test_val = "Glue%s=%s" % (join_attr, val)
-                        if test_val == item_fk:
-                            return entry
-                else:
-                    test_val = "Glue%s=%s" % (join_attr, entry.glue[join_attr])
-                    if test_val == item_fk:
-                        return entry
     else:
-        item_fk = item.glue[join_fk_name]
-        for entry in join_list:
-            if entry.multi:
-                for val in entry.glue[join_attr]:
-                    test_val = "Glue%s=%s" % (join_attr, val)
-                    if test_val == item_fk:
-                        return entry
-            else:
-                test_val = "Glue%s=%s" % (join_attr, entry.glue[join_attr])
-                if test_val == item_fk:
-                    return entry
+        item_fks = [item.glue[join_fk_name]]
+    for item_fk in item_fks:
+        try:
+            return index[item_fk]
+        except KeyError:
+            pass
     raise ValueError("Unable to find matching entry in list.")
 
 def parse_opts():
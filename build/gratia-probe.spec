@@ -213,6 +213,9 @@ install -d $RPM_BUILD_ROOT/%{_sysconfdir}/gratia
       sed -i -e 's#@PROBE_SPECIFIC_DATA@#TitleDCacheStorage="dCache-storage-specific attributes" \
     InfoProviderUrl="http://DCACHE_HOST:2288/info" \
     ReportPoolUsage="0"#' $PROBE_DIR/ProbeConfig
+    elif [ $probe == "dCache-storagegroup" ]; then
+      sed -i -e 's#@PROBE_SPECIFIC_DATA@#ChangeThreshold="0" \
+    FullRefreshInterval="86400"#' $PROBE_DIR/ProbeConfig
     elif [ $probe == "slurm" ]; then
       sed -i -e 's#@PROBE_SPECIFIC_DATA@#SlurmDbHost="db.cluster.example.edu" \
     SlurmDbPort="3306" \
@@ -284,6 +287,7 @@ install -d $RPM_BUILD_ROOT/%{_sysconfdir}/gratia
   rm -rf $RPM_BUILD_ROOT%{_datadir}/gratia/sge/test
   rm -rf $RPM_BUILD_ROOT%{_datadir}/gratia/common/test
   rm     $RPM_BUILD_ROOT%{_datadir}/gratia/dCache-storage/test.xml
+  rm     $RPM_BUILD_ROOT%{_datadir}/gratia/dCache-storage/create_se_record.xsl
 
   # Remove remaining cruft
   rm     $RPM_BUILD_ROOT%{_datadir}/gratia/common/gratia.repo
@@ -608,7 +612,6 @@ Summary: Gratia OSG accounting system probe for dCache storage.
 Group: Applications/System
 Requires: %{name}-common >= %{version}-%{release}
 Requires: %{name}-services
-Requires: xalan-j2
 License: See LICENSE.
 
 Obsoletes: dCache-storage < 1.07.02e-15
@@ -624,7 +627,6 @@ Contributed by Andrei Baranovksi of the OSG Storage team.
 %{python_sitelib}/gratia/dcache_storage
 %dir %{default_prefix}/gratia/dCache-storage
 %{default_prefix}/gratia/dCache-storage/ProbeConfig
-%{default_prefix}/gratia/dCache-storage/create_se_record.xsl
 %{default_prefix}/gratia/dCache-storage/dCache-storage_meter.cron.sh
 %{default_prefix}/gratia/dCache-storage/dCache_storage_probe
 %config(noreplace) %verify(not md5 size mtime) %{_sysconfdir}/gratia/dCache-storage/ProbeConfig
@@ -46,6 +46,7 @@ RecordPid = RecordPidProxy()
 from gratia.common.probe_details import RegisterReporterLibrary, RegisterReporter, RegisterService
 from gratia.common.GratiaCore import Initialize
 from gratia.common.GratiaCore import Maintenance
+from gratia.common.GratiaCore import ReloadConfiguration, RegisterConfigurationReload
 from gratia.common.utils import setProbeBatchManager
 
 from gratia.common.utils import ExtractCvsRevision, ExtractCvsRevisionFromFile, ExtractSvnRevision, ExtractSvnRevisionFromFile
@@ -70,9 +71,9 @@ class UsageRecord(record.Record):
         # parameter
 
         super(self.__class__, self).__init__()
-        DebugPrint(1, 'Creating a UsageRecord ' + TimeToString())
-        self.JobId = []
-        self.UserId = []
+        DebugPrint(1, 'Creating a UsageRecord ' + record.RecordCreateTime())
+        self.JobId = record.RecordFields()
+        self.UserId = record.RecordFields()
         self.Username = 'none'
         self.__ResourceType = resourceType
 
@@ -435,39 +436,22 @@ class UsageRecord(record.Record):
     def VerifyUserInfo(self):
         ''' Verify user information: check for LocalUserId and add VOName and ReportableVOName if necessary'''
 
-        id_info = {}  # Store attributes of already-present information
-        interesting_keys = ['LocalUserId', 'VOName', 'ReportableVOName']
-        for wanted_key in interesting_keys:  # Loop over wanted keys
-            item_index = 0
-            for id_item in self.UserId:  # Loop over existing entries in UserId block
-
-            # Look for key
-
-                match = re.search(r'<\s*(?:[^:]*:)?' + wanted_key + r'\s*>\s*(?P<Value>.*?)\s*<\s*/', id_item,
-                                  re.IGNORECASE)
-
-                # Store info
-
-                if match:
-                    id_info[wanted_key] = {'Value': match.group('Value'), 'Index': item_index}
-                    break
-
-                item_index += 1
-
-        if not id_info.has_key('LocalUserId') or len(id_info) == len(interesting_keys):  # Nothing to do
+        local_user = self.UserId.GetValue('LocalUserId')
+        if local_user is None:  # Nothing to do
+            return
+        if self.UserId.has_key('VOName') and self.UserId.has_key('ReportableVOName'):  # Nothing to do
             return
 
         # Obtain user->VO info from reverse gridmap file.
 
-        vo_info = vo.VOfromUser(id_info['LocalUserId']['Value'])
+        vo_info = vo.VOfromUser(local_user.strip())
         if vo_info != None:
 
             # If we already have one of the two, update both to remain consistent.
 
             for key in ('VOName', 'ReportableVOName'):
-                if id_info.has_key(key):  # Replace existing value
-                    self.UserId[id_info[key]['Index']] = re.sub(r'(>\s*)' + re.escape(id_info[key]['Value'])
-                            + r'(\s*<)', r'\1' + vo_info[key] + r'\2', self.UserId[id_info[key]['Index']], 1)
+                if self.UserId.has_key(key):  # Replace existing value
+                    self.UserId.SetValue(key, escapeXML(vo_info[key]))
                 else:
 
                       # Add new
@@ -488,9 +472,7 @@ class UsageRecord(record.Record):
 
         # Add the record indentity
 
-        self.XmlData.append('<RecordIdentity urwg:recordId="' + socket.getfqdn() + ':' + str(global_state.RecordPid) + '.'
-                            + str(record.RecordId) + '" urwg:createTime="' + TimeToString(time.gmtime()) + '" />\n')
-        record.RecordId += 1
+        self.XmlData.append(self.XmlRecordIdentity())
  
         if len(self.JobId) > 0:
             self.XmlData.append('<JobIdentity>\n')
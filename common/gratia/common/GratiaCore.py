@@ -17,6 +17,7 @@ import traceback
 import re
 import fileinput
 import atexit
+import signal
 import urllib
 
 import gratia.common.ProxyUtil as ProxyUtil
@@ -29,6 +30,7 @@ import gratia.common.bundle as bundle
 import gratia.common.connect_utils as connect_utils
 import gratia.common.probe_config as probe_config
 import gratia.common.probe_details as probe_details
+import gratia.common.record as record
 # TODO: why condor_ce is always imported and initialization is always looking for its history directory?
 import gratia.common.condor_ce as condor_ce
 
@@ -39,7 +41,7 @@ from gratia.common.probe_config import ProbeConfiguration
 from gratia.common.sandbox_mgmt import QuarantineFile, SearchOutstandingRecord
 
 from gratia.common.utils import niceNum, InternalError, ExtractCvsRevision, ExtractCvsRevisionFromFile, ExtractSvnRevision, ExtractSvnRevisionFromFile, TimeToString, setProbeBatchManager
-from gratia.common.debug import Error, DebugPrint, DebugPrintTraceback
+from gratia.common.debug import Error, DebugPrint, DebugPrintTraceback, CloseLog
 from gratia.common.xml_utils import XmlChecker, escapeXML
 from gratia.common.send import Send, SendXMLFiles, Handshake
 from gratia.common.reprocess import Reprocess
@@ -131,6 +133,32 @@ def Initialize(customConfig='ProbeConfig'):
         reprocess.Reprocess()
 
 
+def ReloadConfiguration():
+    '''Re-read the ProbeConfig file used by Initialize'''
+
+    if config.Config:
+        if config.Config.reload():
+            # The log folder or file name may have changed
+            CloseLog()
+            DebugPrint(0, 'Configuration reloaded')
+            global_state.bundle_size = Config.get_BundleSize()
+            connect_utils.timeout = Config.get_ConnectionTimeout()
+            # Look up the host name of the record identities again
+            record.RecordHostName(refresh=True)
+
+
+def __reload_on_signal__(signum, frame):
+    DebugPrint(1, 'Received signal ' + str(signum) + ', reloading the configuration')
+    ReloadConfiguration()
+
+
+def RegisterConfigurationReload(signum=signal.SIGHUP):
+    '''Reload the ProbeConfig file whenever the process receives signum (default SIGHUP).
+    Meant for long running daemons; cron probes re-read the configuration at each run anyway.'''
+
+    signal.signal(signum, __reload_on_signal__)
+
+
 def Maintenance():
     '''This perform routine maintenance that is usually done at'''
 
@@ -11,9 +11,18 @@ import os
 import re
 import glob
 import stat
+import time
 import errno
+import fcntl
+import tempfile
+import subprocess
 import xml.dom.minidom
 
+try:
+    import cPickle
+except ImportError:
+    import pickle as cPickle
+
 import gratia.common.config as config
 import gratia.common.sandbox_mgmt as sandbox_mgmt
 import gratia.common.file_utils as file_utils
@@ -297,23 +306,13 @@ condor_ce_q -const 'RoutedJob =?= true && GridJobId =!= UNDEFINED \
 # Example output:
 # GlobalJobId=brian-test.unl.edu#1655.0#1338817391	x509UserProxyVOName=cms	x509UserProxyFirstFQAN=/cms/Role=NULL/Capability=NULL	x509userproxysubject=/DC=org/DC=doegrids/OU=People/CN=Brian Bockelman 504307	GridJobId=pbs pbs/20120604/2635.brian-test.unl.edu
 
-def queryAllJobs():
+def parseJobs(fd):
     """
-    Quer the Condor-CE directly for the equivalent of the certinfo.
-    Query is done for all jobs and kept in memory.
+    Parse the output of the condor_q query, return a dictionary with the
+    certinfo values of each job, keyed by the batch system job ID.
     """
-    # If the history folder is not set, then we don't even bother
-    # to query the Condor-CE.
-    if not Config.get_CondorCEHistoryFolder():
-        return {}
-
     job_info = {}
-    devnull = open("/dev/null", "w")
-    orig_stderr = os.dup(2)
-    os.dup2(devnull.fileno(), 2)
-    fd = os.popen(condor_q)
-    os.dup2(orig_stderr, 2)
-    for line in fd.readlines():
+    for line in fd:
         line = line.strip()
         cur_job_info = {}
         # Anything before GridJobId should have trivial formatting, tab-delim
@@ -326,36 +325,145 @@ def queryAllJobs():
             cur_job_info[pair[0]] = pair[1]
         if len(info) == 2:
             cur_job_info["GridJobId"] = info[-1]
-        if 'GlobalJobId' in cur_job_info:
+        if 'GlobalJobId' in cur_job_info and 'GridJobId' in cur_job_info:
             jobid = gridJobIdToId(cur_job_info['GridJobId'])
             job_info[jobid] = cur_job_info
-    if fd.close():
+    return job_info
+
+
+def queryAllJobs():
+    """
+    Quer the Condor-CE directly for the equivalent of the certinfo.
+    Query is done for all jobs and kept in memory.
+    Returns None if the query fails.
+    """
+    devnull = open("/dev/null", "w")
+    try:
+        try:
+            proc = subprocess.Popen(condor_q, shell=True, stdout=subprocess.PIPE, stderr=devnull)
+        except OSError, oe:
+            DebugPrint(3, "Condor-CE query failed (%s); ignoring." % str(oe))
+            return None
+    finally:
+        devnull.close()
+    job_info = parseJobs(proc.stdout)
+    if proc.wait():
         DebugPrint(3, "Condor-CE query failed; ignoring.")
-        return {}
-    else:
-        return job_info
+        return None
+    return job_info
+
 
+class JobSnapshot:
+    """
+    Snapshot of the Condor-CE job queue (the condor_q projection above) shared
+    by the probes running on the host.
+
+    The snapshot is a pickled dictionary keyed by job ID, saved in the working
+    folder together with the time of the query.  It is reused until it is older
+    than ttl seconds; the query is run while holding a lock on the snapshot so
+    that concurrent probes wait for it instead of running their own.
+    """
 
-_queryCache = None
+    def __init__(self, filename, ttl):
+        self.filename = filename
+        self.ttl = ttl
+        self.timestamp = 0
+        self.jobs = None
+
+    def fresh(self):
+        return self.jobs is not None and time.time() - self.timestamp < self.ttl
+
+    def load(self):
+        """Load the snapshot on disk, return False if it is missing or expired"""
+        try:
+            fp = open(self.filename, 'rb')
+            try:
+                timestamp, jobs = cPickle.load(fp)
+            finally:
+                fp.close()
+        except IOError, ie:
+            if ie.errno != errno.ENOENT:
+                DebugPrint(2, "Unable to read the Condor-CE snapshot %s: %s" % (self.filename, str(ie)))
+            return False
+        except Exception, e:
+            DebugPrint(2, "Ignoring invalid Condor-CE snapshot %s: %s" % (self.filename, str(e)))
+            return False
+        if time.time() - timestamp >= self.ttl:
+            return False
+        self.timestamp = timestamp
+        self.jobs = jobs
+        return True
+
+    def save(self):
+        try:
+            fd, tmp_name = tempfile.mkstemp(prefix=os.path.basename(self.filename) + '.',
+                                            dir=os.path.dirname(self.filename))
+            fp = os.fdopen(fd, 'wb')
+            try:
+                cPickle.dump((self.timestamp, self.jobs), fp, cPickle.HIGHEST_PROTOCOL)
+            finally:
+                fp.close()
+            os.rename(tmp_name, self.filename)
+        except (IOError, OSError), e:
+            DebugPrint(2, "Unable to save the Condor-CE snapshot %s: %s" % (self.filename, str(e)))
+
+    def refresh(self):
+        """Make sure the snapshot is fresh, querying the Condor-CE only if no other probe did it"""
+        if self.fresh() or self.load():
+            return
+        lock_fd = None
+        try:
+            lock_fd = open(self.filename + '.lock', 'a')
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+        except IOError, ie:
+            DebugPrint(2, "Unable to lock the Condor-CE snapshot %s: %s" % (self.filename, str(ie)))
+        try:
+            # Another probe may have refreshed it while we were waiting
+            if self.load():
+                return
+            self.jobs = queryAllJobs()
+            self.timestamp = time.time()
+            if self.jobs is None:
+                # Do not query again in this process
+                self.jobs = {}
+                return
+            self.save()
+        finally:
+            if lock_fd:
+                lock_fd.close()
+
+    def get(self, jobid):
+        self.refresh()
+        return self.jobs.get(jobid)
+
+
+_snapshot = None
+_certinfoCreated = set()
 def queryJob(jobid):
     """
     Query the Condor-CE directly for the equivalent of the certinfo.
 
     This is only done in the case where we couldn't determine the info from
-    the files on disk.  While we're at it, we pull the data for all jobs and
-    subsequent lookups will perform admirably.
+    the files on disk.  The data for all jobs is pulled at once and shared
+    with the other probes through a JobSnapshot, so subsequent lookups will
+    perform admirably.  A certinfo file is created for the jobs looked up.
     """
-    global _queryCache
-    if _queryCache == None:
-        directory = Config.get_DataFolder()
-        job_info = queryAllJobs()
-        for classad in job_info.values():
-            # On failure, there is not much to do - ignore
-            DebugPrint("Creating certinfo file for %s." % \
-                classad['GlobalJobId'])
-            createCertinfoFile(classad, directory)
-        _queryCache = job_info
-    info = _queryCache.get(jobid, {})
+    global _snapshot
+    # If the history folder is not set, then we don't even bother
+    # to query the Condor-CE.
+    if not Config.get_CondorCEHistoryFolder():
+        return {}
+    if _snapshot == None:
+        _snapshot = JobSnapshot(os.path.join(Config.get_WorkingFolder(), 'condor_ce_q.snapshot'),
+                                Config.get_CondorCESnapshotTTL())
+    info = _snapshot.get(jobid)
+    if not info:
+        return {}
+    if jobid not in _certinfoCreated:
+        # On failure, there is not much to do - ignore
+        DebugPrint(4, "Creating certinfo file for %s." % info['GlobalJobId'])
+        createCertinfoFile(info, Config.get_DataFolder())
+        _certinfoCreated.add(jobid)
     certinfo = {}
     if 'x509UserProxyVOName' in info:
         certinfo["VO"] = info['x509UserProxyVOName']
@@ -364,4 +472,3 @@ def queryJob(jobid):
     if 'x509UserProxyFirstFQAN' in info:
         certinfo['FQAN'] = info['x509UserProxyFirstFQAN']
     return certinfo
-
@@ -2,15 +2,39 @@
 import os
 import sys
 import time
+import atexit
 import string
 import syslog
 import traceback
+import threading
 
 from gratia.common.file_utils import Mkdir
 
 __logFileIsWriteable__ = True
 __quiet__ = 0
 
+# The log file is kept open between messages and written in blocks.
+# Messages are flushed when the buffer exceeds __logBufferLimit__ bytes,
+# __logBufferDelay__ seconds after the oldest buffered message (from a timer
+# thread, so that an idle or sleeping probe does not hold them back), on
+# Error, at exit and from the signal handlers (see FlushLog).
+__logBufferLimit__ = 64 * 1024
+__logBufferDelay__ = 2
+
+__logFd__ = None
+__logFilePid__ = None
+__logRollover__ = 0
+__logBuffer__ = []
+__logBufferSize__ = 0
+__logBufferTime__ = 0
+__logTimer__ = None
+# Protects the log buffer and file descriptor, shared with the flush timer
+__logLock__ = threading.RLock()
+__logLockPid__ = os.getpid()
+
+# (second, long timestamp, short timestamp) of the last formatted message
+__timestamps__ = (None, r'', r'')
+
 
 # TODO: Why this is not using the ConfigProxy like other modules?
 # getGratiaConfig seems complex and unnecessary
@@ -31,13 +55,27 @@ def GenerateOutput(prefix, *arg):
         out = out + str(val)
     return out
 
+def __getTimestamps__():
+    """Return the long (stderr) and short (log file) timestamps for the current second.
+    The strings are only formatted again when the second changes.
+    """
+    global __timestamps__
+    now = int(time.time())
+    if __timestamps__[0] != now:
+        localnow = time.localtime(now)
+        __timestamps__ = (now, time.strftime(r'%Y-%m-%d %H:%M:%S %Z', localnow),
+                          time.strftime(r'%H:%M:%S %Z', localnow))
+    return __timestamps__[1], __timestamps__[2]
+
 def Error(*arg):
     out = GenerateOutput('Error in Gratia probe: ', *arg)
-    print >> sys.stderr, time.strftime(r'%Y-%m-%d %H:%M:%S %Z', time.localtime()) + ' ' + out
+    longStamp, shortStamp = __getTimestamps__()
+    print >> sys.stderr, longStamp + ' ' + out
     if getGratiaConfig() and getGratiaConfig().get_UseSyslog():
         LogToSyslog(-1, GenerateOutput(r'', *arg))
     else:
-        LogToFile(time.strftime(r'%H:%M:%S %Z', time.localtime()) + ' ' + out)
+        LogToFile(shortStamp + ' ' + out)
+        FlushLog()
 
 def DebugPrint(level, *arg):
     """Print debug messages if the level is smaller than the debug level set in the configuration file
@@ -53,18 +91,23 @@ def DebugPrint(level, *arg):
     if __quiet__:
         return
     try:
-        if not getGratiaConfig():
+        conf = getGratiaConfig()
+        if not conf:
+            return
+        toScreen = level < conf.get_DebugLevel()
+        toLog = level < conf.get_LogLevel()
+        if not (toScreen or toLog):
+            # Nothing to do: avoid formatting the message at all
             return
-        if  level < getGratiaConfig().get_DebugLevel():
-            out = time.strftime(r'%Y-%m-%d %H:%M:%S %Z', time.localtime()) + ' ' + GenerateOutput('Gratia: ',
-                    *arg)
-            print >> sys.stderr, out
-        if getGratiaConfig() and level < getGratiaConfig().get_LogLevel():
-            out = GenerateOutput('Gratia: ', *arg)
-            if getGratiaConfig().get_UseSyslog():
+        out = GenerateOutput('Gratia: ', *arg)
+        longStamp, shortStamp = __getTimestamps__()
+        if toScreen:
+            print >> sys.stderr, longStamp + ' ' + out
+        if toLog:
+            if conf.get_UseSyslog():
                 LogToSyslog(level, GenerateOutput(r'', *arg))
             else:
-                LogToFile(time.strftime(r'%H:%M:%S %Z', time.localtime()) + ' ' + out)
+                LogToFile(shortStamp + ' ' + out)
     except:
         out = time.strftime(r'%Y-%m-%d %H:%M:%S %Z', time.localtime()) + ' ' \
             + GenerateOutput('Gratia: printing failed message: ', *arg)
@@ -83,33 +126,86 @@ def LogFileName():
     return os.path.join(getGratiaConfig().get_LogFolder(), filename)
 
 
-def LogToFile(message):
-    '''Write a message to the Gratia log file'''
+def __openLogFile__(now):
+    """(Re)open the log file for the current day; the next rollover is set at local midnight"""
 
-    global __logFileIsWriteable__
-    current_file = None
-    filename = 'none'
+    global __logFd__, __logFilePid__, __logRollover__, __logBuffer__, __logBufferSize__
 
-    try:
+    if __logFilePid__ == os.getpid():
+        FlushLog()
+    else:
+        # Inherited from the parent process across a fork: the parent
+        # owns (and will write) whatever was still buffered.
+        __logBuffer__ = []
+        __logBufferSize__ = 0
+    if __logFd__ != None:
+        try:
+            os.close(__logFd__)
+        except OSError:
+            pass
+        __logFd__ = None
+
+    # Ensure the 'logs' folder exists
+
+    if os.path.exists(getGratiaConfig().get_LogFolder()) == 0:
+        Mkdir(getGratiaConfig().get_LogFolder())
+
+    filename = LogFileName()
+
+    if os.path.exists(filename) and not os.access(filename, os.W_OK):
+        os.chown(filename, os.getuid(), os.getgid())
+        os.chmod(filename, 0755)
 
-        # Ensure the 'logs' folder exists
+    # Open/Create a log file for today's date
 
-        if os.path.exists(getGratiaConfig().get_LogFolder()) == 0:
-            Mkdir(getGratiaConfig().get_LogFolder())
+    __logFd__ = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0666)
+    __logFilePid__ = os.getpid()
+    today = time.localtime(now)
+    __logRollover__ = time.mktime((today[0], today[1], today[2] + 1, 0, 0, 0, 0, 0, -1))
+    return filename
 
-        filename = LogFileName()
 
-        if os.path.exists(filename) and not os.access(filename, os.W_OK):
-            os.chown(filename, os.getuid(), os.getgid())
-            os.chmod(filename, 0755)
+def __acquireLog__():
+    """Acquire the log lock, a new one in a forked child (the lock may have been held by another thread)"""
 
-        # Open/Create a log file for today's date
+    global __logLock__, __logLockPid__
+    if __logLockPid__ != os.getpid():
+        __logLock__ = threading.RLock()
+        __logLockPid__ = os.getpid()
+    __logLock__.acquire()
 
-        current_file = open(filename, 'a')
 
-        # Append the message to the log file
+def __startLogTimer__():
+    """Flush the log buffer in __logBufferDelay__ seconds"""
 
-        current_file.write(message + '\n')
+    global __logTimer__
+    __logTimer__ = threading.Timer(__logBufferDelay__, FlushLog)
+    __logTimer__.setDaemon(True)
+    __logTimer__.start()
+
+
+def LogToFile(message):
+    '''Write a message to the Gratia log file'''
+
+    global __logFileIsWriteable__, __logBufferSize__, __logBufferTime__
+    filename = 'none'
+
+    __acquireLog__()
+    try:
+        now = time.time()
+        if __logFd__ == None or now >= __logRollover__ or __logFilePid__ != os.getpid():
+            filename = LogFileName()
+            __openLogFile__(now)
+
+        # Append the message to the log buffer
+
+        if not __logBuffer__:
+            __logBufferTime__ = now
+            __startLogTimer__()
+        __logBuffer__.append(message + '\n')
+        __logBufferSize__ += len(message) + 1
+        if __logBufferSize__ >= __logBufferLimit__ or now - __logBufferTime__ >= __logBufferDelay__:
+            FlushLog()
 
         __logFileIsWriteable__ = True
     except:
@@ -120,12 +216,51 @@ def LogToFile(message):
             print >> sys.stderr, 'Gratia: Unable to log to file:  ', filename, ' ', sys.exc_info(), '--', \
                 sys.exc_info()[0], '++', sys.exc_info()[1]
         __logFileIsWriteable__ = False
+    __logLock__.release()
 
-    if current_file != None:
 
-        # Close the log file
+def FlushLog():
+    '''Write out the buffered log messages.
+    Call before os.fork or os._exit, which would respectively duplicate or lose them.'''
 
-        current_file.close()
+    global __logBuffer__, __logBufferSize__
+    __acquireLog__()
+    try:
+        if not __logBuffer__ or __logFd__ == None or __logFilePid__ != os.getpid():
+            return
+        pending, __logBuffer__ = __logBuffer__, []
+        __logBufferSize__ = 0
+        data = string.join(pending, r'')
+        try:
+            while data:
+                written = os.write(__logFd__, data)
+                data = data[written:]
+        except OSError:
+            print >> sys.stderr, 'Gratia: Unable to write to the log file: ', sys.exc_info()[1]
+    finally:
+        __logLock__.release()
+
+
+def CloseLog():
+    '''Flush and close the log file; the next message reopens it (e.g. after a configuration change)'''
+
+    global __logFd__
+    __acquireLog__()
+    try:
+        if __logTimer__ != None:
+            __logTimer__.cancel()
+        FlushLog()
+        if __logFd__ != None and __logFilePid__ == os.getpid():
+            try:
+                os.close(__logFd__)
+            except OSError:
+                pass
+        __logFd__ = None
+    finally:
+        __logLock__.release()
+
+
+atexit.register(CloseLog)
 
 
 def LogToSyslog(level, message):
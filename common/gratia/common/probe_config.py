@@ -31,7 +31,9 @@ class ProbeConfiguration:
     Class giving access (and in some cases override capability) to the ProbeConfig files
     """
     
-    __doc = None
+    __attributes = None
+    __typed = None
+    __overrides = None
     __configname = 'ProbeConfig'
     __CollectorHost = None
     __ProbeName = None
@@ -54,9 +56,22 @@ class ProbeConfiguration:
         else:
             DebugPrint(0,"Error: configuration file %s doesn't exist" % (customConfig,))
             raise utils.InternalError("Error: configuration file %s doesn't exist" % (customConfig,))
+        self.__overrides = {}
 
     def __loadConfiguration__(self):
-        self.__doc = xml.dom.minidom.parse(self.__configname)
+        """
+        Parse the configuration file once and keep the attributes of the
+        ProbeConfiguration element in a dictionary.  The previous map (if any)
+        is only replaced once the new one is complete.
+        """
+        doc = xml.dom.minidom.parse(self.__configname)
+        attributes = {}
+        nodes = doc.getElementsByTagName('ProbeConfiguration')
+        if nodes:
+            for (name, value) in nodes[0].attributes.items():
+                attributes[name] = value
+        self.__attributes = attributes
+        self.__typed = {}
         DebugPrint(1, 'Using config file: ' + self.__configname)
 
     def __getConfigAttribute(self, attributeName):
@@ -64,17 +79,75 @@ class ProbeConfiguration:
         Return the value of a configuration attribute name 'attributeName' as a string.
         If no such attribute exists, an empty string is returned, as if the attribute had no value
         """
-        if self.__doc == None:
+        if self.__attributes == None:
             try:
                 self.__loadConfiguration__()
             except xml.parsers.expat.ExpatError, ex:
                 sys.stderr.write('Parse error in ' + self.__configname + ': ' + str(ex) + '\n')
                 raise
 
-        # TODO:  Check if the ProbeConfiguration node exists
-        # TODO:  Check if the requested attribute exists
+        return self.__attributes.get(attributeName, r'')
 
-        return self.__doc.getElementsByTagName('ProbeConfiguration')[0].getAttribute(attributeName)
+    def __getIntAttribute(self, attributeName, default):
+        """
+        Return the value of 'attributeName' converted to an integer, or 'default' if the
+        attribute is missing or empty.  The converted value is cached until the next reload.
+        """
+        try:
+            return self.__typed[attributeName]
+        except (KeyError, TypeError):
+            pass
+        val = self.__getConfigAttribute(attributeName)
+        if val == None or val == r'':
+            result = default
+        else:
+            result = int(val)
+        self.__typed[attributeName] = result
+        return result
+
+    def __getBoolAttribute(self, attributeName, default):
+        """
+        Return True if 'attributeName' is one of True/1/t (case insensitive), False if it is
+        set to anything else and 'default' if it is missing.  Cached until the next reload.
+        """
+        try:
+            return self.__typed[attributeName]
+        except (KeyError, TypeError):
+            pass
+        val = self.__getConfigAttribute(attributeName)
+        if val:
+            result = re.search(r'^(True|1|t)$', val, re.IGNORECASE) != None
+        else:
+            result = default
+        self.__typed[attributeName] = result
+        return result
+
+    def reload(self):
+        """
+        Re-read the configuration file, e.g. after a SIGHUP in a long running daemon.
+        Values set explicitly through the set_* methods are preserved.
+        """
+        try:
+            self.__loadConfiguration__()
+        except xml.parsers.expat.ExpatError, ex:
+            DebugPrint(0, 'Error: unable to reload ' + self.__configname + ', keeping the previous configuration: '
+                       + str(ex))
+            return False
+        self.__CollectorHost = None
+        self.__Grid = None
+        self.__LogLevel = None
+        self.__LogRotate = None
+        self.__DataFileExpiration = None
+        self.__QuarantineSize = None
+        self.__UseSyslog = None
+        self.__UserVOMapFile = None
+        self.__FilenameFragment = None
+        self.__CertInfoLogPattern = None
+        self.__VOOverride = None
+        self.__ProbeName = self.__overrides.get('ProbeName')
+        self.__SiteName = self.__overrides.get('SiteName')
+        self.__DebugLevel = self.__overrides.get('DebugLevel')
+        return True
 
     # Public interface
 
@@ -215,12 +288,14 @@ class ProbeConfiguration:
 
     def setMeterName(self, name):
         self.__ProbeName = name
+        self.__overrides['ProbeName'] = name
 
     def get_MeterName(self):
         return self.get_ProbeName()
 
     def setProbeName(self, name):
         self.__ProbeName = name
+        self.__overrides['ProbeName'] = name
         self.__FilenameFragment = None
 
     def get_ProbeName(self):
@@ -236,11 +311,11 @@ class ProbeConfiguration:
                 if mresult != None and mresult != r'':
                     result = mresult
             if result == None or result == r'':
-                self.setProbeName(utils.genDefaultProbeName())
+                result = utils.genDefaultProbeName()
                 DebugPrint(0, 'INFO: ProbeName not specified in ' + self.__configname + ': defaulting to '
-                           + self.__ProbeName)
-            else:
-                self.setProbeName(result)
+                           + result)
+            self.__ProbeName = result
+            self.__FilenameFragment = None
         return self.__ProbeName
 
     def getFilenameFragment(self):
@@ -251,8 +326,8 @@ class ProbeConfiguration:
             if fragment:
                 fragment += r'_'
             fragment += self.get_SOAPHost()
-            __FilenameFragment = re.sub(r'[:/]', r'_', fragment)
-        return __FilenameFragment
+            self.__FilenameFragment = re.sub(r'[:/]', r'_', fragment)
+        return self.__FilenameFragment
 
     def get_Grid(self):
         if self.__Grid == None:
@@ -265,6 +340,7 @@ class ProbeConfiguration:
 
     def setSiteName(self, name):
         self.__SiteName = name
+        self.__overrides['SiteName'] = name
 
     def get_SiteName(self):
         if self.__SiteName == None:
@@ -276,18 +352,10 @@ class ProbeConfiguration:
         return self.__SiteName
 
     def get_UseSSL(self):
-        val = self.__getConfigAttribute('UseSSL')
-        if val == None or val == r'':
-            return 0
-        else:
-            return int(val)
+        return self.__getIntAttribute('UseSSL', 0)
 
     def get_UseSoapProtocol(self):
-        val = self.__getConfigAttribute('UseSoapProtocol')
-        if val == None or val == r'':
-            return 0
-        else:
-            return int(val)
+        return self.__getIntAttribute('UseSoapProtocol', 0)
 
     def get_UseGratiaCertificates(self):
         return int(self.__getConfigAttribute('UseGratiaCertificates'))
@@ -299,6 +367,7 @@ class ProbeConfiguration:
 
     def set_DebugLevel(self, val):
         self.__DebugLevel = int(val)
+        self.__overrides['DebugLevel'] = self.__DebugLevel
 
     def get_LogLevel(self):
         if self.__LogLevel == None:
@@ -311,38 +380,22 @@ class ProbeConfiguration:
 
     def get_LogRotate(self):
         if self.__LogRotate == None:
-            val = self.__getConfigAttribute('LogRotate')
-            if val == None or val == r'':
-                self.__LogRotate = 31
-            else:
-                self.__LogRotate = int(val)
+            self.__LogRotate = self.__getIntAttribute('LogRotate', 31)
         return self.__LogRotate
 
     def get_DataFileExpiration(self):
         if self.__DataFileExpiration == None:
-            val = self.__getConfigAttribute('DataFileExpiration')
-            if val == None or val == r'':
-                self.__DataFileExpiration = 31
-            else:
-                self.__DataFileExpiration = int(val)
+            self.__DataFileExpiration = self.__getIntAttribute('DataFileExpiration', 31)
         return self.__DataFileExpiration
 
     def get_QuarantineSize(self):
         if self.__QuarantineSize == None:
-            val = self.__getConfigAttribute('QuarantineSize')
-            if val == None or val == r'':
-                self.__QuarantineSize = 200 * 1000 * 1000
-            else:
-                self.__QuarantineSize = int(val) * 1000 * 1000
+            self.__QuarantineSize = self.__getIntAttribute('QuarantineSize', 200) * 1000 * 1000
         return self.__QuarantineSize
 
     def get_UseSyslog(self):
         if self.__UseSyslog == None:
-            val = self.__getConfigAttribute('UseSyslog')
-            if val == None or val == r'':
-                self.__UseSyslog = False
-            else:
-                self.__UseSyslog = int(val)
+            self.__UseSyslog = self.__getIntAttribute('UseSyslog', False)
         return self.__UseSyslog
 
     def get_GratiaExtension(self):
@@ -351,6 +404,9 @@ class ProbeConfiguration:
     def get_CondorCEHistoryFolder(self):
         return self.__getConfigAttribute('CondorCEHistoryFolder')
 
+    def get_CondorCESnapshotTTL(self):
+        return self.__getIntAttribute('CondorCESnapshotTTL', 300)
+
     def get_CertificateFile(self):
         return self.__getConfigAttribute('CertificateFile')
 
@@ -358,18 +414,13 @@ class ProbeConfiguration:
         return self.__getConfigAttribute('KeyFile')
 
     def get_MaxPendingFiles(self):
-        val = self.__getConfigAttribute('MaxPendingFiles')
-        if val == None or val == r'':
-            return 100000
-        else:
-            return int(val)
+        return self.__getIntAttribute('MaxPendingFiles', 100000)
 
     def get_MaxStagedArchives(self):
-        val = self.__getConfigAttribute('MaxStagedArchives')
-        if val == None or val == r'':
-            return 400
-        else:
-            return int(val)
+        return self.__getIntAttribute('MaxStagedArchives', 400)
+
+    def get_MaxRetentionRemovals(self):
+        return self.__getIntAttribute('MaxRetentionRemovals', 10000)
 
     def get_DataFolder(self):
         return self.__getConfigAttribute('DataFolder')
@@ -407,70 +458,24 @@ class ProbeConfiguration:
         return self.__UserVOMapFile
 
     def get_SuppressUnknownVORecords(self):
-        result = self.__getConfigAttribute('SuppressUnknownVORecords')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return None
+        return self.__getBoolAttribute('SuppressUnknownVORecords', None)
 
     def get_MapUnknownToGroup(self):
-        result = self.__getConfigAttribute('MapUnknownToGroup')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return None
+        return self.__getBoolAttribute('MapUnknownToGroup', None)
 
     def get_SuppressNoDNRecords(self):
-        result = self.__getConfigAttribute('SuppressNoDNRecords')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return None
+        return self.__getBoolAttribute('SuppressNoDNRecords', None)
     def get_QuarantineUnknownVORecords(self):
-        result = self.__getConfigAttribute('QuarantineUnknownVORecords')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return True 
+        return self.__getBoolAttribute('QuarantineUnknownVORecords', True)
 
 
     def get_SuppressgridLocalRecords(self):
-        result = self.__getConfigAttribute('SuppressGridLocalRecords')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return False  # If the config entry is missing, default to false
+        # If the config entry is missing, default to false
+        return self.__getBoolAttribute('SuppressGridLocalRecords', False)
 
     def get_NoCertinfoBatchRecordsAreLocal(self):
-        result = self.__getConfigAttribute('NoCertinfoBatchRecordsAreLocal')
-        if result:
-            match = re.search(r'^(True|1|t)$', result, re.IGNORECASE)
-            if match:
-                return True
-            else:
-                return False
-        else:
-            return True  # If the config entry is missing, default to true
+        # If the config entry is missing, default to true
+        return self.__getBoolAttribute('NoCertinfoBatchRecordsAreLocal', True)
 
     def get_BundleSize(self):
         result = self.__getConfigAttribute('BundleSize')
@@ -484,11 +489,7 @@ class ProbeConfiguration:
         return bundle.bundle_size
 
     def get_ConnectionTimeout(self):
-        val = self.__getConfigAttribute('ConnectionTimeout')
-        if val == None or val == r'':
-            return 900
-        else:
-            return int(val)    
+        return self.__getIntAttribute('ConnectionTimeout', 900)
 
     def get_VOOverride(self):
         # Get the VOOverride, which can be 'None', therefore using the 
@@ -35,7 +35,7 @@ class ProbeDetails(record.Record):
         # Initializer
 
         super(self.__class__, self).__init__()
-        DebugPrint(1, 'Creating a ProbeDetails record ' + utils.TimeToString())
+        DebugPrint(1, 'Creating a ProbeDetails record ' + record.RecordCreateTime())
 
         self.__ProbeDetails__ = []
 
@@ -73,9 +73,7 @@ class ProbeDetails(record.Record):
 
         # Add the record indentity
 
-        self.XmlData.append('<RecordIdentity recordId="' + socket.getfqdn() + ':' + str(global_state.RecordPid) + '.'
-                            + str(record.RecordId) + '" createTime="' + utils.TimeToString(time.gmtime()) + '" />\n')
-        record.RecordId += 1
+        self.XmlData.append(self.XmlRecordIdentity(r''))
 
         for data in self.RecordData:
             self.XmlData.append('\t')
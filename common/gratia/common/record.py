@@ -1,8 +1,11 @@
 
 import os
+import time
 import shutil
+import socket
 
 import gratia.common.config as config
+import gratia.common.global_state as global_state
 import gratia.common.utils as utils
 import gratia.common.xml_utils as xml_utils
 
@@ -13,6 +16,114 @@ Config = config.ConfigProxy()
 
 RecordId = 0
 
+# Seconds after which the host name of the record identity is looked up again
+HostNameRefresh = 3600
+
+# [value, time of the lookup]
+__hostname__ = [None, 0]
+# [second, value]
+__createtime__ = [None, r'']
+
+def RecordHostName(refresh=False):
+    '''Return the fully qualified name of this host, as used in the record identity.
+    It is looked up once and then only every HostNameRefresh seconds or when refresh is True'''
+
+    now = time.time()
+    if refresh or __hostname__[0] is None or now - __hostname__[1] > HostNameRefresh:
+        __hostname__[0] = socket.getfqdn()
+        __hostname__[1] = now
+    return __hostname__[0]
+
+def RecordCreateTime():
+    '''Return the current time in the xml format (recomputed at most once per second)'''
+
+    now = int(time.time())
+    if __createtime__[0] != now:
+        __createtime__[0] = now
+        __createtime__[1] = utils.TimeToString(time.gmtime(now))
+    return __createtime__[1]
+
+def NextRecordIdentity():
+    '''Return the recordId and createTime of a new record and advance the record counter'''
+
+    global RecordId
+    recordid = RecordHostName() + ':' + str(global_state.RecordPid) + '.' + str(RecordId)
+    RecordId += 1
+    return recordid, RecordCreateTime()
+
+class RecordFields(object):
+
+    '''Ordered store of the xml elements of a record.
+
+    Each element is kept as its tag, attributes and (already escaped) value
+    and is rendered to xml only when iterated over (i.e. in XmlCreate).
+    Replacing an element is O(1): the previous values are blanked out through
+    an index on the tag rather than by rescanning the rendered list.
+    Iterating yields the same xml fragments that the former string lists held.
+    '''
+
+    __slots__ = ('entries', 'index', 'count')
+
+    def __init__(self):
+        self.entries = []  # [tag, attributes, value] or None when replaced
+        self.index = {}    # tag -> positions in entries
+        self.count = 0
+
+    def Append(self, what, comment, value):
+        '''Add an element, keeping any other element with the same tag'''
+
+        self.index.setdefault(what, []).append(len(self.entries))
+        self.entries.append([what, comment, value])
+        self.count += 1
+
+    def Replace(self, what, comment, value):
+        '''Add an element, removing any other element with the same tag'''
+
+        positions = self.index.pop(what, None)
+        if positions:
+            for pos in positions:
+                self.entries[pos] = None
+            self.count -= len(positions)
+        self.Append(what, comment, value)
+
+    def GetValue(self, what, default=None):
+        '''Return the (escaped) value of the first element with this tag'''
+
+        positions = self.index.get(what)
+        if not positions:
+            return default
+        return self.entries[positions[0]][2]
+
+    def SetValue(self, what, value):
+        '''Change the value of the first element with this tag, in place'''
+
+        self.entries[self.index[what][0]][2] = value
+
+    def has_key(self, what):
+        return what in self.index
+
+    def append(self, fragment):
+        '''List compatibility: add a verbatim xml fragment'''
+
+        self.Append(None, None, fragment)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for entry in self.entries:
+            if entry is None:
+                continue
+            what = entry[0]
+            if what is None:
+                yield entry[2]
+            else:
+                yield '<' + what + ' ' + entry[1] + '>' + entry[2] + '</' + what + '>'
+
+    def __str__(self):
+        return str(list(self))
+
+
 class Record(object):
 
     '''Base class for the Gratia Record'''
@@ -38,7 +149,7 @@ class Record(object):
             DebugPrint(0,"Error: Configuration is not initialized")
             raise utils.InternalError("Configuration is not initialized") 
 
-        DebugPrint(2, 'Creating a Record ' + utils.TimeToString())
+        DebugPrint(2, 'Creating a Record ' + RecordCreateTime())
         self.XmlData = []
         self.__ProbeName = Config.get_ProbeName()
         self.__ProbeNameDescription = r''
@@ -46,13 +157,20 @@ class Record(object):
         self.__SiteNameDescription = r''
         self.__Grid = Config.get_Grid()
         self.__GridDescription = r''
-        self.RecordData = []
+        self.RecordData = RecordFields()
         self.TransientInputFiles = []
         self.__VOOverrid = Config.get_VOOverride()
 
     def Print(self):
         DebugPrint(3, 'Usage Record: ', self)
 
+    def XmlRecordIdentity(self, prefix='urwg:'):
+        '''Return the RecordIdentity element for a new record (Do not call directly)'''
+
+        recordid, createtime = NextRecordIdentity()
+        return '<RecordIdentity ' + prefix + 'recordId="' + recordid + '" ' + prefix + 'createTime="' \
+            + createtime + '" />\n'
+
     def VerbatimAppendToList(
         self,
         where,
@@ -62,7 +180,10 @@ class Record(object):
         ):
         ''' Helper Function to generate the xml (Do not call directly)'''
 
-        where.append('<' + what + ' ' + comment + '>' + value + '</' + what + '>')
+        if isinstance(where, RecordFields):
+            where.Append(what, comment, value)
+        else:
+            where.append('<' + what + ' ' + comment + '>' + value + '</' + what + '>')
         return where
 
     def VerbatimAddToList(
@@ -74,6 +195,10 @@ class Record(object):
         ):
         ''' Helper Function to generate the xml (Do not call directly)'''
 
+        if isinstance(where, RecordFields):
+            where.Replace(what, comment, value)
+            return where
+
         # First filter out the previous value
 
         where = [x for x in where if x.find('<' + what) != 0]
@@ -0,0 +1,311 @@
+
+"""
+Retention of the files in the log, data and quarantine directories.
+
+Each managed directory (and file name pattern) has a RetentionIndex: the
+modification time and size of the files, saved in the retention
+subdirectory of the WorkingFolder (outside of the managed directory, so
+that saving the index does not modify it).  The directory is listed again
+only when its own modification time changed and only the new files are
+stat-ed, so the cost of a cleanup does not grow with the number of files
+kept.
+Files are removed from the oldest end, up to a maximum per run.
+"""
+
+import os
+import stat
+import time
+import errno
+import heapq
+import fnmatch
+import tempfile
+
+try:
+    import cPickle
+except ImportError:
+    import pickle as cPickle
+
+import gratia.common.config as config
+
+from gratia.common.file_utils import Mkdir, RemoveFile
+from gratia.common.utils import niceNum
+from gratia.common.debug import DebugPrint, LogFileName
+
+Config = config.ConfigProxy()
+
+# Subdirectory of the WorkingFolder holding the index files
+INDEX_DIR = 'retention'
+# Files modified less than this before the last scan may still be growing (e.g. the current log file)
+RECENT_SECONDS = 24 * 3600
+
+__indexes__ = {}
+
+
+def GetRetentionIndex(dirname, pattern):
+    """Return the RetentionIndex of the files matching pattern in dirname, loading it once per process"""
+
+    key = (os.path.abspath(dirname), pattern)
+    try:
+        return __indexes__[key]
+    except KeyError:
+        pass
+    index_dir = os.path.join(Config.get_WorkingFolder(), INDEX_DIR)
+    Mkdir(index_dir)
+    index = RetentionIndex(key[0], pattern, index_dir)
+    __indexes__[key] = index
+    return index
+
+
+class RetentionIndex:
+    """
+    Size-annotated age index of the files matching a pattern in a directory.
+
+    files maps the file names to (mtime, size), heap has (mtime, name) entries for
+    the oldest first removal. Heap entries not matching files are stale and skipped.
+    """
+
+    def __init__(self, dirname, pattern, index_dir):
+        self.dirname = dirname
+        self.pattern = pattern
+        self.index_file = os.path.join(index_dir, ''.join([(c.isalnum() or c in '._-') and c or '_'
+                                                           for c in os.path.join(dirname, pattern)]))
+        self.files = {}
+        self.heap = []
+        self.total = 0
+        self.dir_mtime = None
+        self.scan_time = 0
+        self.dirty = False
+        self.__load()
+
+    def __load(self):
+        try:
+            fd = open(self.index_file, 'rb')
+            try:
+                self.dir_mtime, self.scan_time, self.files = cPickle.load(fd)
+            finally:
+                fd.close()
+        except IOError, ex:
+            if ex.errno != errno.ENOENT:
+                DebugPrint(2, 'Unable to read the retention index ' + self.index_file + ': ' + str(ex))
+            return
+        except Exception, ex:
+            # corrupted index, it will be rebuilt with a full scan
+            DebugPrint(1, 'Ignoring the invalid retention index ' + self.index_file + ': ' + str(ex))
+            self.dir_mtime = None
+            self.scan_time = 0
+            self.files = {}
+            return
+        self.heap = [(mtime, name) for name, (mtime, size) in self.files.items()]
+        heapq.heapify(self.heap)
+        self.total = sum([size for mtime, size in self.files.values()])
+
+    def save(self):
+        """Write the index if it changed (temporary file and rename)"""
+
+        if not self.dirty:
+            return
+        try:
+            fd, tmp_name = tempfile.mkstemp(prefix=os.path.basename(self.index_file) + '.',
+                                           dir=os.path.dirname(self.index_file))
+        except (IOError, OSError), ex:
+            DebugPrint(2, 'Unable to save the retention index ' + self.index_file + ': ' + str(ex))
+            return
+        try:
+            fp = os.fdopen(fd, 'wb')
+            try:
+                cPickle.dump((self.dir_mtime, self.scan_time, self.files), fp, cPickle.HIGHEST_PROTOCOL)
+            finally:
+                fp.close()
+            os.rename(tmp_name, self.index_file)
+        except (IOError, OSError), ex:
+            DebugPrint(2, 'Unable to save the retention index ' + self.index_file + ': ' + str(ex))
+            RemoveFile(tmp_name)
+            return
+        self.dirty = False
+
+    def matches(self, name):
+        # glob does not match hidden files unless the pattern starts with a dot
+        if name.startswith('.') and not self.pattern.startswith('.'):
+            return False
+        return fnmatch.fnmatch(name, self.pattern)
+
+    def __stat(self, name):
+        """Return (mtime, size) of a regular file, None if it is missing or not a file"""
+
+        try:
+            st = os.stat(os.path.join(self.dirname, name))
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return st.st_mtime, st.st_size
+
+    def __set(self, name, info):
+        old = self.files.get(name)
+        if old == info:
+            return
+        if old is not None:
+            self.total -= old[1]
+        if info is None:
+            if old is not None:
+                del self.files[name]
+                self.dirty = True
+            return
+        self.files[name] = info
+        self.total += info[1]
+        if old is None or old[0] != info[0]:
+            heapq.heappush(self.heap, (info[0], name))
+        self.dirty = True
+
+    def refresh(self):
+        """Bring the index up to date, listing the directory only if it was modified"""
+
+        try:
+            dir_mtime = os.stat(self.dirname).st_mtime
+        except OSError:
+            self.files.clear()
+            self.heap = []
+            self.total = 0
+            self.dir_mtime = None
+            return
+        now = time.time()
+        added = {}
+        if dir_mtime != self.dir_mtime:
+            try:
+                names = [name for name in os.listdir(self.dirname) if self.matches(name)]
+            except OSError, ex:
+                DebugPrint(1, 'Unable to list ' + self.dirname + ': ' + str(ex))
+                return
+            names = dict.fromkeys(names)
+            for name in self.files.keys():
+                if name not in names:
+                    self.__set(name, None)
+            for name in names:
+                if name not in self.files:
+                    added[name] = None
+                    self.__set(name, self.__stat(name))
+            self.dir_mtime = dir_mtime
+            self.dirty = True
+        # The recent files may have been appended to since
+        recent = self.scan_time - RECENT_SECONDS
+        for name, (mtime, size) in self.files.items():
+            if mtime >= recent and name not in added:
+                self.__set(name, self.__stat(name))
+        self.scan_time = now
+
+    def __pop_oldest(self, cutoff=None):
+        """Remove the oldest file, return (name, size) or None if there is none (older than cutoff)"""
+
+        while self.heap:
+            mtime, name = self.heap[0]
+            info = self.files.get(name)
+            if info is None or info[0] != mtime:
+                # stale heap entry
+                heapq.heappop(self.heap)
+                continue
+            if cutoff is not None and mtime >= cutoff:
+                return None
+            current = self.__stat(name)
+            if current != info:
+                # modified (or removed) since it was indexed, check it again in its new place
+                self.__set(name, current)
+                continue
+            heapq.heappop(self.heap)
+            DebugPrint(2, 'Will remove: ' + os.path.join(self.dirname, name))
+            RemoveFile(os.path.join(self.dirname, name))
+            self.__set(name, None)
+            return name, info[1]
+        return None
+
+    def __size_limit(self, req_maxsize):
+        """Return the size limit for the directory, considering the free space on the disk (0 for no limit)"""
+
+        totalsize = self.total
+        statfs = os.statvfs(self.dirname)
+        disksize = statfs.f_blocks
+        freespace = statfs.f_bfree
+        ourblocks = totalsize / statfs.f_frsize
+        percent = ourblocks * 100.0 / disksize
+
+        if percent < 1:
+            DebugPrint(1, self.dirname + ' uses ' + niceNum(percent, 1e-3) + '% and there is ' + niceNum(freespace * 100
+                       / disksize) + '% free')
+        else:
+            DebugPrint(1, self.dirname + ' uses ' + niceNum(percent, 0.10000000000000001) + '% and there is '
+                       + niceNum(freespace * 100 / disksize) + '% free')
+
+        minfree = 0.10000000000000001 * disksize  # We want the disk to be no fuller than 95%
+        # We want the directory to not be artificially reduced below 5% because other things are filling up the disk.
+        minuse = 0.05 * disksize
+        calc_maxsize = req_maxsize
+        if freespace < minfree:
+
+           # The disk is quite full
+
+            if ourblocks > minuse:
+
+              # We already use more than 5%, let's see how much we can delete to get under 95% full but not under 5% of
+              # our own use
+
+                target = minfree - freespace  # We would like to remove than much
+
+                if ourblocks - target < minuse:
+
+                 # But it would take us under 5%, so do what we can
+
+                    calc_maxsize = minuse
+                else:
+                    calc_maxsize = ourblocks - target
+
+                if 0 < req_maxsize and req_maxsize < calc_maxsize * statfs.f_frsize:
+                    calc_maxsize = req_maxsize
+                else:
+                    DebugPrint(4,
+                               "DEBUG: The disk is quite full and this directory is 'large' attempting to reduce from "
+                                + niceNum(totalsize / 1000000) + 'Mb to ' + niceNum(calc_maxsize / 1000000) + 'Mb.')
+                    calc_maxsize = calc_maxsize * statfs.f_frsize
+        return calc_maxsize
+
+    def enforce(self, nDays, req_maxsize=0, max_removals=-1):
+        """
+        Remove the files older than nDays, then the oldest ones while the directory is above its size limit
+        (req_maxsize or less if the disk is full).  At most max_removals files are removed (-1 for no limit).
+        Return the number of files removed.
+        """
+
+        self.refresh()
+        removed = 0
+        cutoff = time.time() - nDays * 24 * 3600
+        while removed != max_removals and self.__pop_oldest(cutoff):
+            removed += 1
+        if removed == max_removals:
+            DebugPrint(1, 'Removed the maximum of ' + str(removed) + ' files from ' + self.dirname
+                       + ', the others will be removed in the next runs')
+            self.save()
+            return removed
+
+        if not self.files:
+            self.save()
+            return removed
+
+        calc_maxsize = self.__size_limit(req_maxsize)
+        if calc_maxsize > 0 and self.total > calc_maxsize:
+            DebugPrint(1, 'Cleaning up directory due to space overflow: ' + niceNum(self.total / 1e6,
+                       0.10000000000000001), 'Mb for a limit of ', niceNum(calc_maxsize / 1e6,
+                       0.10000000000000001), ' Mb.')
+            calc_maxsize = 0.8 * calc_maxsize
+            currentLogFile = LogFileName()
+            while removed != max_removals and self.total >= calc_maxsize:
+                result = self.__pop_oldest()
+                if not result:
+                    break
+                removed += 1
+                if currentLogFile == os.path.join(self.dirname, result[0]):
+
+                 # We delete the current log file! Let's record this explicitly!
+
+                    DebugPrint(0, 'EMERGENCY DELETION AND TRUNCATION OF LOG FILES.')
+                    DebugPrint(0, 'Current log file was too large: ' + niceNum(result[1] / 1000000) + 'Mb.')
+                    DebugPrint(0, 'All prior information has been lost.')
+        self.save()
+        return removed
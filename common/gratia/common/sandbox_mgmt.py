@@ -10,9 +10,9 @@ import tarfile
 
 from gratia.common.config import ConfigProxy
 from gratia.common.file_utils import Mkdir, RemoveFile
-from gratia.common.utils import niceNum
-from gratia.common.debug import DebugPrint, DebugPrintTraceback, LogFileName
+from gratia.common.debug import DebugPrint, DebugPrintTraceback
 import gratia.common.global_state as global_state
+import gratia.common.retention as retention
 
 Config = ConfigProxy()
 
@@ -89,111 +89,27 @@ def RemoveRecordFile(filename):
 
 
 def RemoveOldFiles(nDays=31, globexp=None, req_maxsize=0):
+    """
+    Remove the files matching globexp older than nDays, then the oldest ones if they use more than
+    req_maxsize bytes (or too much of an almost full disk).
+    The files are tracked in a persistent retention index per directory, see gratia.common.retention,
+    and at most Config.get_MaxRetentionRemovals() files are removed per call.
+    """
 
     if not globexp:
         return
 
-    # Get the list of all files in the log directory
-
-    files = glob.glob(globexp)
-    if not files:
-        return
-
-    DebugPrint(3, ' Will check the files: ', files)
-
-    cutoff = time.time() - nDays * 24 * 3600
-
-    totalsize = 0
-
-    date_file_list = []
-    for oldfile in files:
-        if not os.path.isfile(oldfile):
-            continue
-        lastmod_date = os.path.getmtime(oldfile)
-        if lastmod_date < cutoff:
-            DebugPrint(2, 'Will remove: ' + oldfile)
-            RemoveFile(oldfile)
-        else:
-            size = os.path.getsize(oldfile)
-            totalsize += size
-            date_file_tuple = (lastmod_date, size, oldfile)
-            date_file_list.append(date_file_tuple)
-
-    if len(date_file_list) == 0:
-
-       # No more files.
-
-        return
-
-    dirname = os.path.dirname(date_file_list[0][2])
-    statfs = os.statvfs(dirname)
-    disksize = statfs.f_blocks
-    freespace = statfs.f_bfree
-    ourblocks = totalsize / statfs.f_frsize
-    percent = ourblocks * 100.0 / disksize
-
-    if percent < 1:
-        DebugPrint(1, dirname + ' uses ' + niceNum(percent, 1e-3) + '% and there is ' + niceNum(freespace * 100
-                   / disksize) + '% free')
+    dirname, pattern = os.path.split(globexp)
+    if glob.has_magic(dirname):
+        dirs = [d for d in glob.glob(dirname) if os.path.isdir(d)]
+    elif os.path.isdir(dirname):
+        dirs = [dirname]
     else:
-        DebugPrint(1, dirname + ' uses ' + niceNum(percent, 0.10000000000000001) + '% and there is '
-                   + niceNum(freespace * 100 / disksize) + '% free')
-
-    minfree = 0.10000000000000001 * disksize  # We want the disk to be no fuller than 95%
-    # We want the directory to not be artificially reduced below 5% because other things are filling up the disk.
-    minuse = 0.05 * disksize  
-    calc_maxsize = req_maxsize
-    if freespace < minfree:
-
-       # The disk is quite full
-
-        if ourblocks > minuse:
-
-          # We already use more than 5%, let's see how much we can delete to get under 95% full but not under 5% of
-          # our own use
-
-            target = minfree - freespace  # We would like to remove than much
-
-            if ourblocks - target < minuse:
-
-             # But it would take us under 5%, so do what we can
-
-                calc_maxsize = minuse
-            else:
-                calc_maxsize = ourblocks - target
+        return
 
-            if 0 < req_maxsize and req_maxsize < calc_maxsize * statfs.f_frsize:
-                calc_maxsize = req_maxsize
-            else:
-                DebugPrint(4,
-                           "DEBUG: The disk is quite full and this directory is 'large' attempting to reduce from "
-                            + niceNum(totalsize / 1000000) + 'Mb to ' + niceNum(calc_maxsize / 1000000) + 'Mb.')
-                calc_maxsize = calc_maxsize * statfs.f_frsize
-
-    if calc_maxsize > 0 and totalsize > calc_maxsize:
-        DebugPrint(1, 'Cleaning up directory due to space overflow: ' + niceNum(totalsize / 1e6,
-                   0.10000000000000001), 'Mb for a limit of ', niceNum(calc_maxsize / 1e6,
-                   0.10000000000000001), ' Mb.')
-        calc_maxsize = 0.8 * calc_maxsize
-        date_file_list.sort()
-
-       # To get the newest first (for debugging purpose only)
-       # date_file_list.reverse()
-
-        currentLogFile = LogFileName()
-        for file_tuple in date_file_list:
-            DebugPrint(2, 'Will remove: ' + file_tuple[2])
-            RemoveFile(file_tuple[2])
-            totalsize = totalsize - file_tuple[1]
-            if currentLogFile == file_tuple[2]:
-
-             # We delete the current log file! Let's record this explicitly!
-
-                DebugPrint(0, 'EMERGENCY DELETION AND TRUNCATION OF LOG FILES.')
-                DebugPrint(0, 'Current log file was too large: ' + niceNum(file_tuple[1] / 1000000) + 'Mb.')
-                DebugPrint(0, 'All prior information has been lost.')
-            if totalsize < calc_maxsize:
-                return
+    for current_dir in dirs:
+        index = retention.GetRetentionIndex(current_dir, pattern)
+        index.enforce(nDays, req_maxsize, Config.get_MaxRetentionRemovals())
 
 
 def RemoveOldLogs(nDays=31):
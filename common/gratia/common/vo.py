@@ -45,56 +45,30 @@ we primarily want to pull this information from the CE and avoid using
 these routines.
 
 In addition to parsing the user-vo-map file, this module will cache the
-results in memory for quicker lookup.
+results in a compiled form (see CompiledVOMap) next to the file, rebuilt
+only when the file changes, for quicker startup and lookup.
 """
 
+import os
 import re
+import time
+import mmap
+import struct
+import tempfile
 
 from gratia.common.debug import DebugPrint, DebugPrintTraceback
 import gratia.common.config as config
 
-# Various module-level data caches.
-__UserVODictionary = None
-__voiToVOcDictionary = None
-__dictionaryErrorStatus = False
-def __InitializeDictionary__():
-    """
-    For internal use only.  Parse the user-vo-map file and initialize the
-    module-internal data structures with the contents.  From now on, VO
-    information lookup in this module will be done via an in-memory lookup.
+# Seconds between the checks of the user-vo-map file for changes
+CHECK_INTERVAL = 60
 
-    Will only be attempted once
+def parseMapfile(mapfile):
     """
-
-    # Check if there was previously an error
-    # If so, do not retry initialization
-    global __dictionaryErrorStatus, __voiToVOcDictionary, __UserVODictionary
-    if __dictionaryErrorStatus:
-        return
-
-    __voiToVOcDictionary = {}
-    __UserVODictionary = {}
-    __dictionaryErrorStatus = True
-
-    mapfile = config.Config.get_UserVOMapFile()
-    if mapfile == None:
-        DebugPrint(2, "WARNING: No mapfile specified; not using VO mapping.")
-        return
-
-    try:
-        __InitializeDictionary_internal(mapfile)
-        __dictionaryErrorStatus = False
-    except IOError, e:
-        DebugPrint(0, 'WARNING: IO error exception initializing user-vo-map mapfile %s: %s' % (mapfile, str(e)))
-        DebugPrintTraceback()
-
-def __InitializeDictionary_internal(mapfile):
-    """
-    Given a mapfile filename, initialize the module-internal data structures with
-    its contents.
+    Parse the user-vo-map file `mapfile`.
 
     See module documentation for more info about the mapfile format.
 
+    Returns the dictionaries (user -> {'VOName': <voi>, 'ReportableVOName': <VOc>}, voi -> VOc).
     Throws an IOError on exception.
     """
 
@@ -102,11 +76,13 @@ def __InitializeDictionary_internal(mapfile):
     commentLine_re = re.compile("\s*#")
     userVOLine_re = re.compile("\s*(?P<User>\S+)\s*(?P<voi>\S+)")
 
+    userVODictionary = {}
+    voiToVOcDictionary = {}
     voi_info = []
     VOc_info = []
     DebugPrint(4, 'DEBUG: Initializing (voi, VOc) lookup table')
     fd = open(mapfile, "r")
-    for line in fd.readlines():
+    for line in fd:
         # Process the magic voi / VOc comment line, which provides the correct capitalization
         # of the VO names.
         mapMatch = magicCommentLine_re.match(line)
@@ -119,7 +95,7 @@ def __InitializeDictionary_internal(mapfile):
 
         # One time initialization of the lookup dictionary.
         # This code assumes it happens before the first user is encountered.
-        if not __voiToVOcDictionary and voi_info and VOc_info:
+        if not voiToVOcDictionary and voi_info and VOc_info:
             entries = min(len(voi_info), len(VOc_info))
             if entries != len(voi_info):
                 DebugPrint(0, 'WARNING: VOc line does not have at least as many entries as voi line in %s'
@@ -129,7 +105,7 @@ def __InitializeDictionary_internal(mapfile):
                     DebugPrint(0, 'WARNING: no VOc match for voi "%s'
                         '": not entering in (voi, VOc) table.' % voi_info[index])
                     continue
-                __voiToVOcDictionary[voi_info[index]] = VOc_info[index]
+                voiToVOcDictionary[voi_info[index]] = VOc_info[index]
 
         # Handle normal comments:
         mapMatch = commentLine_re.match(line)
@@ -142,13 +118,265 @@ def __InitializeDictionary_internal(mapfile):
             user = mapMatch.group('User')
             voi = mapMatch.group('voi')
             # Update the VO info dictionary.
-            info = __UserVODictionary.setdefault(user, {})
+            info = userVODictionary.setdefault(user, {})
             info['VOName'] = voi
-            if voi in __voiToVOcDictionary:
-                info['ReportableVOName'] = __voiToVOcDictionary[voi]
+            if voi in voiToVOcDictionary:
+                info['ReportableVOName'] = voiToVOcDictionary[voi]
             else:
                 DebugPrint(0, 'WARNING: voi "%s" listed for user "%s" not found in ' \
                     '(voi, VOc) table' % (voi, user))
+    fd.close()
+    return userVODictionary, voiToVOcDictionary
+
+
+class DictVOMap:
+    """User-VO map kept in memory, used if the compiled map cannot be written"""
+
+    def __init__(self, users, voc):
+        self.users = users
+        self.vocs = voc
+
+    def user(self, user):
+        info = self.users.get(user)
+        if info is None:
+            return None
+        return dict(info)
+
+    def voc(self, voi):
+        return self.vocs.get(voi)
+
+
+class CompiledVOMap:
+    """
+    Compiled form of the user-vo-map, mmap-ed and searched in place.
+
+    The file has a header (magic, mtime and size of the source file, number of users and of VOs),
+    the table of the offsets of the user records sorted by user name, the table of the offsets
+    of the VO records sorted by voi, and the records: "user\\0voi\\0VOc\\0" and "voi\\0VOc\\0".
+    An empty VOc means that the user's voi is not in the (voi, VOc) table.
+    """
+
+    MAGIC = 'GRVOMAP1'
+    # After this many users looked up in the file, all the users are read at once
+    LOAD_ALL_AFTER = 1024
+    HEADER = struct.Struct('<8sdqII')
+    OFFSET = struct.Struct('<I')
+
+    def __init__(self, filename):
+        fd = open(filename, 'rb')
+        try:
+            self.mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            fd.close()
+        magic, self.source_mtime, self.source_size, self.nusers, self.nvos = \
+            self.HEADER.unpack_from(self.mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError("%s is not a compiled user-vo-map" % filename)
+        self.users_table = self.HEADER.size
+        self.vos_table = self.users_table + 4 * self.nusers
+        # results of the lookups done so far
+        self.users = {}
+        self.vocs = {}
+        self.misses = 0
+        self.loaded = False
+
+    def __find(self, table, count, key):
+        """Return the offset of the value after key, -1 if key is not in the table"""
+        mm = self.mm
+        unpack_from = self.OFFSET.unpack_from
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = unpack_from(mm, table + 4 * mid)[0]
+            end = mm.find('\0', offset)
+            current = mm[offset:end]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return end + 1
+        return -1
+
+    def __values(self, offset, count):
+        mm = self.mm
+        result = []
+        for i in range(count):
+            end = mm.find('\0', offset)
+            result.append(mm[offset:end])
+            offset = end + 1
+        return result
+
+    def __loadUsers(self):
+        """Memoize all the users, with a single split of their records"""
+        start = self.vos_table + 4 * self.nvos
+        if self.nvos:
+            end = self.OFFSET.unpack_from(self.mm, self.vos_table)[0]
+        else:
+            end = len(self.mm)
+        fields = self.mm[start:end].split('\0')
+        users = {}
+        for i in range(0, 3 * self.nusers, 3):
+            if fields[i + 2]:
+                users[fields[i]] = {'VOName': fields[i + 1], 'ReportableVOName': fields[i + 2]}
+            else:
+                users[fields[i]] = {'VOName': fields[i + 1]}
+        self.users = users
+        self.loaded = True
+
+    def user(self, user):
+        try:
+            info = self.users[user]
+        except KeyError:
+            info = None
+            self.misses += 1
+            if self.loaded:
+                offset = -1
+            elif self.misses > self.LOAD_ALL_AFTER:
+                self.__loadUsers()
+                return self.user(user)
+            else:
+                offset = self.__find(self.users_table, self.nusers, user)
+            if offset >= 0:
+                voi, voc = self.__values(offset, 2)
+                if voc:
+                    info = {'VOName': voi, 'ReportableVOName': voc}
+                else:
+                    info = {'VOName': voi}
+            self.users[user] = info
+        if info is None:
+            return None
+        return dict(info)
+
+    def voc(self, voi):
+        try:
+            return self.vocs[voi]
+        except KeyError:
+            pass
+        offset = self.__find(self.vos_table, self.nvos, voi)
+        if offset < 0:
+            voc = None
+        else:
+            voc = self.__values(offset, 1)[0]
+        self.vocs[voi] = voc
+        return voc
+
+    def write(filename, users, voc, source_mtime, source_size):
+        """Write the compiled map (temporary file and rename)"""
+        records = []
+        user_offsets = []
+        vo_offsets = []
+        offset = CompiledVOMap.HEADER.size + 4 * (len(users) + len(voc))
+        for user in sorted(users.keys()):
+            info = users[user]
+            record = '%s\0%s\0%s\0' % (user, info['VOName'], info.get('ReportableVOName', ''))
+            user_offsets.append(offset)
+            records.append(record)
+            offset += len(record)
+        for voi in sorted(voc.keys()):
+            record = '%s\0%s\0' % (voi, voc[voi])
+            vo_offsets.append(offset)
+            records.append(record)
+            offset += len(record)
+        fd, tmp_name = tempfile.mkstemp(prefix=os.path.basename(filename) + '.', dir=os.path.dirname(filename))
+        try:
+            fp = os.fdopen(fd, 'wb')
+            try:
+                fp.write(CompiledVOMap.HEADER.pack(CompiledVOMap.MAGIC, source_mtime, source_size,
+                                                   len(users), len(voc)))
+                fp.write(struct.pack('<%dI' % len(user_offsets), *user_offsets))
+                fp.write(struct.pack('<%dI' % len(vo_offsets), *vo_offsets))
+                fp.write(''.join(records))
+            finally:
+                fp.close()
+            os.chmod(tmp_name, 0644)
+            os.rename(tmp_name, filename)
+        except:
+            os.unlink(tmp_name)
+            raise
+    write = staticmethod(write)
+
+
+def __compiledFilenames(mapfile):
+    """The compiled map is next to the source, or in the working folder if that is not writable"""
+    result = [mapfile + '.compiled']
+    try:
+        working_folder = config.Config.get_WorkingFolder()
+    except AttributeError:
+        working_folder = None
+    if working_folder:
+        result.append(os.path.join(working_folder, os.path.basename(mapfile) + '.compiled'))
+    return result
+
+
+def __loadMap(mapfile, st):
+    """
+    Return the map of `mapfile` (with the stat result `st`): the compiled map if it is up to date,
+    otherwise compile it.  Throws an IOError on exception.
+    """
+    candidates = __compiledFilenames(mapfile)
+    for filename in candidates:
+        try:
+            compiled = CompiledVOMap(filename)
+        except (IOError, OSError, ValueError, struct.error, mmap.error):
+            continue
+        if compiled.source_mtime == st.st_mtime and compiled.source_size == st.st_size:
+            DebugPrint(4, 'DEBUG: Using the compiled user-vo-map ' + filename)
+            return compiled
+
+    users, voc = parseMapfile(mapfile)
+    for filename in candidates:
+        try:
+            CompiledVOMap.write(filename, users, voc, st.st_mtime, st.st_size)
+            DebugPrint(3, 'Compiled the user-vo-map %s in %s' % (mapfile, filename))
+            return CompiledVOMap(filename)
+        except (IOError, OSError), e:
+            DebugPrint(4, 'DEBUG: Unable to write the compiled user-vo-map %s: %s' % (filename, str(e)))
+    return DictVOMap(users, voc)
+
+
+# Various module-level data caches.
+__voMap = None
+__voMapKey = None
+__lastCheck = 0
+__dictionaryErrorStatus = False
+def __CheckMap__():
+    """
+    For internal use only.  Load the user-vo-map, from its compiled form if it is up to date,
+    and check the file for changes at most every CHECK_INTERVAL seconds, so that long running
+    probes see the changes.
+    """
+
+    global __voMap, __voMapKey, __lastCheck, __dictionaryErrorStatus
+    now = time.time()
+    if __voMap is not None and 0 <= now - __lastCheck < CHECK_INTERVAL:
+        return
+    __lastCheck = now
+
+    mapfile = config.Config.get_UserVOMapFile()
+    if mapfile == None:
+        if not __dictionaryErrorStatus:
+            DebugPrint(2, "WARNING: No mapfile specified; not using VO mapping.")
+        __dictionaryErrorStatus = True
+        __voMap = DictVOMap({}, {})
+        __voMapKey = None
+        return
+
+    try:
+        st = os.stat(mapfile)
+        key = (mapfile, st.st_mtime, st.st_size)
+        if __voMap is not None and key == __voMapKey:
+            return
+        __voMap = __loadMap(mapfile, st)
+        __voMapKey = key
+        __dictionaryErrorStatus = False
+    except (IOError, OSError), e:
+        if not __dictionaryErrorStatus:
+            DebugPrint(0, 'WARNING: IO error exception initializing user-vo-map mapfile %s: %s' % (mapfile, str(e)))
+            DebugPrintTraceback()
+        __dictionaryErrorStatus = True
+        if __voMap is None:
+            __voMap = DictVOMap({}, {})
 
 
 def VOc(voi):
@@ -156,10 +384,11 @@ def VOc(voi):
     Given a short-form VO name, `voi`, return the long-form VO name with proper
     capitalization (the "VOc").
     """
-    if __voiToVOcDictionary == None:
-        __InitializeDictionary__()
-
-    return __voiToVOcDictionary.get(voi, voi)
+    __CheckMap__()
+    result = __voMap.voc(voi)
+    if result is None:
+        return voi
+    return result
 
 
 def VOfromUser(user):
@@ -173,8 +402,5 @@ def VOfromUser(user):
 
     If the user is unknown to the user-vo-map, then this returns None.
     """
-    if __UserVODictionary == None:
-        __InitializeDictionary__()
-
-    return __UserVODictionary.get(user, None)
-
+    __CheckMap__()
+    return __voMap.user(user)
@@ -19,6 +19,9 @@ from gratia.common.debug import DebugPrint, DebugPrintTraceback
 
 Config = config.ConfigProxy()
 
+# Characters that escapeXML has to replace
+__xml_special__ = re.compile('[&<>"\']')
+
 def safeEncodeXML(xmlDoc):
     if utils.pythonVersionRequire(2, 3):
         xmlOutput = xmlDoc.toxml(encoding='utf-8')
@@ -55,6 +58,9 @@ def escapeXML(xmlData):
 ## param - xmlData:  The xml to encode
 ## returns - the encoded xml
 ##
+    # Most values (numbers, durations, names) have nothing to escape
+    if not __xml_special__.search(xmlData):
+        return xmlData
     return xml.sax.saxutils.escape(xmlData, {"'": '&apos;', '"': '&quot;'})
 
 class XmlCheckerObject(object):
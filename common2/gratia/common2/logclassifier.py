@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# /* vim: set expandtab tabstop=4 shiftwidth=4 softtabstop=4: */
+
+###########################################################################
+#
+# Classification of log lines for the log parsing probes
+# Most lines of a log are rejected or recognized with plain string
+# operations, regular expressions are tried only on lines containing the
+# literal (marker) of their rule.
+# Log timestamps repeat a lot (many lines in the same second), the
+# conversion to seconds since the epoch is memoized.
+# This is compatible with Python 2.4
+#
+###########################################################################
+
+import re
+
+
+class LineClassifier(object):
+    """Ordered list of rules assigning a kind to log lines
+
+    Each rule has a marker, a literal that the line must start with (anchored)
+    or contain, and optionally a regular expression matched only if the marker
+    is found. The first rule matching the line wins.
+    """
+
+    def __init__(self):
+        self.rules = []
+
+    def add_rule(self, kind, marker, regex=None, anchored=True):
+        """Add a rule at the end of the list
+
+        :param kind: value returned by classify for the lines matching this rule
+        :param marker: literal string that must be at the beginning of the line (or anywhere if not anchored)
+        :param regex: optional regular expression (string or compiled), matched (re.match) after the marker is found
+        :param anchored: if True (default) the line must start with marker
+        :return: None
+        """
+        if regex is not None and isinstance(regex, basestring):
+            regex = re.compile(regex)
+        self.rules.append((kind, marker, regex, anchored))
+
+    def classify(self, line):
+        """Find the first rule matching the line
+
+        :param line: log line (or part of it)
+        :return: (kind, match) of the rule, match is None if the rule has no regular expression;
+            (None, None) if no rule matches
+        """
+        for kind, marker, regex, anchored in self.rules:
+            if anchored:
+                if not line.startswith(marker):
+                    continue
+            elif marker not in line:
+                continue
+            if regex is None:
+                return kind, None
+            match = regex.match(line)
+            if match:
+                return kind, match
+        return None, None
+
+
+class TimestampCache(object):
+    """Memoized conversion of log timestamps (strings) to seconds since the epoch
+
+    The converter is called with the second-resolution part of the timestamp:
+    the first `length` characters, or the whole string if length is None.
+    Anything after it (e.g. fractions of second) is ignored.
+    Exceptions raised by the converter (e.g. ValueError for malformed
+    timestamps) are propagated and not cached.
+    """
+
+    def __init__(self, converter, length=None, size=4096):
+        """
+        :param converter: function converting the timestamp string to seconds since the epoch
+        :param length: number of characters of the timestamp up to the seconds (None for all)
+        :param size: maximum number of conversions kept (the cache is emptied when full)
+        """
+        self.converter = converter
+        self.length = length
+        self.size = size
+        self.cache = {}
+
+    def __call__(self, timestamp):
+        if self.length is not None:
+            timestamp = timestamp[:self.length]
+        try:
+            return self.cache[timestamp]
+        except KeyError:
+            pass
+        value = self.converter(timestamp)
+        if len(self.cache) >= self.size:
+            self.cache.clear()
+        self.cache[timestamp] = value
+        return value
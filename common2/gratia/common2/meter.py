@@ -29,7 +29,7 @@ import gratia.common.Gratia as Gratia
 #import gratia.services.ComputeElementRecord as ComputeElementRecord
 
 # TODO: change once common.Gratia is modified
-from gratia.common.debug import DebugPrint, LogFileName
+from gratia.common.debug import DebugPrint, LogFileName, FlushLog
 #from gratia.common.Gratia import DebugPrint, LogFileName
 import gratia.common.GratiaWrapper as GratiaWrapper
 
@@ -61,6 +61,7 @@ def warn_of_signal_generator(alarm):
         DebugPrint(2, "Going down on signal " + str(signum))
         if alarm is not None:
             alarm.event()
+        FlushLog()
         os._exit(1)
     return f
 
@@ -42,6 +42,10 @@ class PgInput(DbInput):
         Psycopg's Range	range
         Anything(TM)	json
         uuid	uuid
+
+    Long queries can be paginated (see query_pages): QueryPageSize in the config file is the maximum
+    number of rows per page (0, the default, disables the pagination) and QueryPageMemory the approximate
+    maximum memory in MB used by the rows of a page (0 for no limit).
     """
 
     def __init__(self, conn=None):
@@ -54,6 +58,25 @@ class PgInput(DbInput):
             self._connection = conn
         else:
             self._connection = None
+        # pagination parameters (rows and bytes), 0 means no limit
+        self.page_size = 0
+        self.page_memory = 0
+
+    def get_init_params(self):
+        """Return list of parameters to read form the config file"""
+        return DbInput.get_init_params(self) + ['QueryPageSize', 'QueryPageMemory']
+
+    def start(self, static_info):
+        """Read the pagination parameters and connect to the database"""
+        try:
+            self.page_size = int(static_info['QueryPageSize'])
+        except (KeyError, ValueError, TypeError):
+            pass
+        try:
+            self.page_memory = int(static_info['QueryPageMemory']) * 1024 * 1024
+        except (KeyError, ValueError, TypeError):
+            pass
+        DbInput.start(self, static_info)
 
     def open_db_conn(self):
         """Return a database connection"""
@@ -161,7 +184,7 @@ class PgInput(DbInput):
         if trans_status is not None:
             retv = "%s (%s/%s)" % (retv, trans_status, trans_string)
         
-    def query(self, sql):
+    def query(self, sql, params=None, buffer_size=None):
         """Generator returning one row at the time as pseudo-dictionary (DictCursor).
 
         psycopg2.extras.DictCursor is a tuple, accessible by indexes and returned as
@@ -172,6 +195,9 @@ class PgInput(DbInput):
         NOTE that the values are not mutable (cannot be changed)
 
         :param sql: string w/ the SQL query
+        :param params: sequence of parameters for the query (%s placeholders in sql), None if there are none
+        :param buffer_size: if provided, a new cursor fetching buffer_size rows at the time is used for this
+            query and closed at the end (named cursors can execute only one query)
         :return: row as psycopg2.extras.DictCursor (tuple and dictionary)
         """
         if not sql:
@@ -182,15 +208,18 @@ class PgInput(DbInput):
             if not self.open_db_conn():
                 DebugPrint(2, "WARNING: Unable to open connection: no query.")
             return
-        if not self._cursor:
-            self._cursor = self._get_cursor(self._connection)
+        if buffer_size:
+            cursor = self._get_cursor(self._connection, buffer_size)
+        else:
             if not self._cursor:
-                DebugPrint(2, "WARNING: Unable to get cursor: no query.")
-                return
-        cursor = self._cursor
-        DebugPrint(4, "Executing SQL: %s" % sql)
+                self._cursor = self._get_cursor(self._connection)
+            cursor = self._cursor
+        if not cursor:
+            DebugPrint(2, "WARNING: Unable to get cursor: no query.")
+            return
+        DebugPrint(4, "Executing SQL: %s (%s)" % (sql, params))
         try:
-            cursor.execute(sql)
+            cursor.execute(sql, params)
         except psycopg2.ProgrammingError, er:
             DebugPrint(2, "ERROR, error running the query: %s" % er)
         if cursor.rowcount is None:
@@ -199,15 +228,100 @@ class PgInput(DbInput):
             DebugPrint(3, "WARNING, no rows returned by the query (rowcount: %s). OK for iterators." %
                        cursor.rowcount)
         # resultset = self._cur.fetchall()
-        if self.support_itersize:
-            for r in cursor:
-                yield r
-        else:
-            # implement itersize manually (for psycopg < 2.4)
-            # normal iteration would be inefficient fetching one record at the time
-            while True:
-                resultset = cursor.fetchmany()
-                if not resultset:
-                    break
-                for r in resultset:
+        try:
+            if self.support_itersize:
+                for r in cursor:
                     yield r
+            else:
+                # implement itersize manually (for psycopg < 2.4)
+                # normal iteration would be inefficient fetching one record at the time
+                while True:
+                    resultset = cursor.fetchmany()
+                    if not resultset:
+                        break
+                    for r in resultset:
+                        yield r
+        finally:
+            if buffer_size:
+                try:
+                    cursor.close()
+                except psycopg2.InterfaceError:
+                    pass
+
+    @staticmethod
+    def _row_size(row):
+        """Approximate memory used by a row (bytes)"""
+        size = 0
+        for i in row:
+            size += sys.getsizeof(i)
+        return size
+
+    def query_pages(self, select_sql, key_columns, where_clauses=None, start_key=None, page_callback=None,
+                    page_size=None):
+        """Generator returning one row at the time, like query, fetching the rows in pages.
+
+        Rows are sorted by key_columns and each page starts after the key of the last row of the previous one
+        (keyset pagination), so no OFFSET is used and the cost of a page does not depend on its position.
+        The number of rows in a page is page_size, reduced if needed so that the page uses approximately
+        at most page_memory bytes (the row size is measured on the previous page).
+        page_callback allows to advance a checkpoint at every page: it is invoked with the last row of a page
+        once the caller has consumed it, i.e. when the generator is resumed after returning that row.
+
+        :param select_sql: SELECT ... FROM ... part of the query, without WHERE, ORDER BY and LIMIT
+        :param key_columns: list of columns used to sort and resume the query. Together they must be unique
+            and NOT NULL (rows with NULL values in the key would be skipped)
+        :param where_clauses: list of additional conditions (joined with AND)
+        :param start_key: sequence of values of key_columns. Only rows after it are returned (None for all)
+        :param page_callback: function invoked with the last row of every page (see above)
+        :param page_size: maximum number of rows per page, default self.page_size. 0 for a single page
+        :return: row as psycopg2.extras.DictCursor (tuple and dictionary)
+        """
+        if page_size is None:
+            page_size = self.page_size
+        if where_clauses is None:
+            where_clauses = []
+        order_sql = ", ".join(key_columns)
+        rows = page_size
+        page = 0
+        while True:
+            clauses = list(where_clauses)
+            params = None
+            if start_key is not None:
+                # the '%' in the rest of the query must be escaped when psycopg2 replaces the parameters
+                clauses = [i.replace('%', '%%') for i in clauses]
+                clauses.append("(%s) > (%s)" % (order_sql, ", ".join(["%s"] * len(key_columns))))
+                params = tuple(start_key)
+                sql = select_sql.replace('%', '%%')
+            else:
+                sql = select_sql
+            if clauses:
+                sql = "%s WHERE %s" % (sql, " AND ".join(clauses))
+            sql = "%s ORDER BY %s" % (sql, order_sql)
+            if rows > 0:
+                sql = "%s LIMIT %d" % (sql, rows)
+                buffer_size = rows
+            else:
+                buffer_size = None
+            page += 1
+            count = 0
+            page_bytes = 0
+            last_row = None
+            for r in self.query(sql, params, buffer_size):
+                count += 1
+                if self.page_memory > 0 and count <= 100:
+                    # sampling the first rows is enough to estimate the size
+                    page_bytes += self._row_size(r)
+                last_row = r
+                yield r
+            DebugPrint(4, "Page %s of the query completed: %s rows" % (page, count))
+            if last_row is None:
+                return
+            if page_callback is not None:
+                page_callback(last_row)
+            if rows <= 0 or count < rows:
+                # single page or last (incomplete) page
+                return
+            start_key = [last_row[i] for i in key_columns]
+            if self.page_memory > 0:
+                row_bytes = max(1, page_bytes / min(count, 100))
+                rows = max(1, min(page_size, self.page_memory / row_bytes))
@@ -271,8 +271,9 @@ def datetime_to_utc(dt_in, assume_local=True, naive=False):
 
 ## Parse and format dates
 
-def parse_datetime(date_string_in, return_seconds=False, assume_local=False):
-    """Parse date/time string and return datetime object.
+def _parse_datetime_strptime(date_string_in, return_seconds=False, assume_local=False):
+    """Parse date/time string and return datetime object, trying the formats with time.strptime.
+    Reference implementation, see parse_datetime
 
     This function provides only limited support of the iso8601 format
     e.g. Time zone specifications (different from Z for UTC) are not supported
@@ -341,8 +342,183 @@ def parse_datetime(date_string_in, return_seconds=False, assume_local=False):
     return datetime(*result[0:6])
 
 
-def format_datetime(date_in, iso8601=True):
-    """Format the date as iso8601 or %Y-%m-%d %H:%M:%S.
+class LRUCache(object):
+    """Small cache keeping the most recently used values
+
+    The least recently used policy is approximated with two generations:
+    when the current generation is full it replaces the old one, the values
+    found in the old generation are moved back to the current one.
+    At most 2*size values are kept.
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.current = {}
+        self.old = {}
+
+    def get(self, key, default=None):
+        try:
+            return self.current[key]
+        except KeyError:
+            pass
+        try:
+            value = self.old.pop(key)
+        except KeyError:
+            return default
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if len(self.current) >= self.size:
+            self.old = self.current
+            self.current = {}
+        self.current[key] = value
+
+
+def _parse_fixed(date_string):
+    """Parse the most common fixed width formats without strptime
+
+    %Y-%m-%dT%H:%M:%S, %Y-%m-%d %H:%M:%S, %Y%m%dT%H:%M:%S, %Y%m%d %H:%M:%S, %Y-%m-%d, %Y%m%d
+
+    :param date_string: date/time string, stripped and without the final Z
+    :return: (year, month, day, hour, minute, second) tuple,
+        None if the string is not in one of the formats or the values are out of range
+    """
+    length = len(date_string)
+    if length == 19:
+        if not (date_string[4] == '-' and date_string[7] == '-' and date_string[10] in 'T ' and
+                date_string[13] == ':' and date_string[16] == ':'):
+            return None
+        digits = (date_string[0:4], date_string[5:7], date_string[8:10],
+                  date_string[11:13], date_string[14:16], date_string[17:19])
+    elif length == 17:
+        if not (date_string[8] in 'T ' and date_string[11] == ':' and date_string[14] == ':'):
+            return None
+        digits = (date_string[0:4], date_string[4:6], date_string[6:8],
+                  date_string[9:11], date_string[12:14], date_string[15:17])
+    elif length == 10:
+        if not (date_string[4] == '-' and date_string[7] == '-'):
+            return None
+        digits = (date_string[0:4], date_string[5:7], date_string[8:10], '00', '00', '00')
+    elif length == 8:
+        digits = (date_string[0:4], date_string[4:6], date_string[6:8], '00', '00', '00')
+    else:
+        return None
+    if not ''.join(digits).isdigit():
+        return None
+    year, month, day, hour, minute, second = [int(i) for i in digits]
+    # leap seconds and other corner cases are left to strptime
+    if year < 1 or not 1 <= month <= 12 or hour > 23 or minute > 59 or second > 59:
+        return None
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return year, month, day, hour, minute, second
+
+
+class DatetimeParser(object):
+    """Date/time string parser, see parse_datetime
+
+    The fixed width formats are parsed directly (_parse_fixed), the others with time.strptime
+    starting from the format that succeeded last: each caller parsing strings with a consistent
+    format can use its own parser. The results are memoized (at most cache_size values).
+    """
+
+    # strptime formats, and whether the string has to be normalized to %Y%m%d[ %H:%M:%S] before
+    FORMATS = (("%Y-%m-%dT%H:%M:%S", False), ("%Y%m%d %H:%M:%S", True), ("%Y%m%d", True))
+
+    def __init__(self, cache_size=1024):
+        self.last_format = 0
+        self.cache = LRUCache(cache_size)
+
+    @staticmethod
+    def _normalize(date_string):
+        # normalize the string to %Y%m%d[ %H:%M:%S]
+        dt_arr = date_string.split('T')
+        if not len(dt_arr) == 2:
+            dt_arr = date_string.split()
+            if not len(dt_arr) == 2:
+                dt_arr.append('')
+        return ("%s %s" % (dt_arr[0].replace('-', ''), dt_arr[1])).strip()
+
+    def _strptime(self, date_string):
+        """Try the strptime formats, starting from the last successful one
+
+        :return: (time-tuple) or None if no format matches
+        """
+        formats = self.FORMATS
+        count = len(formats)
+        for i in range(self.last_format, self.last_format + count):
+            fmt, normalize = formats[i % count]
+            try:
+                if normalize:
+                    result = time.strptime(self._normalize(date_string), fmt)
+                else:
+                    result = time.strptime(date_string, fmt)
+            except ValueError:
+                continue
+            self.last_format = i % count
+            return result
+        return None
+
+    def parse(self, date_string_in, return_seconds=False, assume_local=False):
+        """Parse date/time string, same arguments and results as parse_datetime"""
+        key = (date_string_in, return_seconds, assume_local)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        date_string = date_string_in.strip()
+        is_utc = None
+        if date_string and date_string[-1] == 'Z':
+            is_utc = True
+            date_string = date_string[:-1]
+        fields = _parse_fixed(date_string)
+        if fields is None:
+            tt = self._strptime(date_string)
+            if tt is None:
+                # no valid format, get the same errors (and messages) of the strptime implementation
+                return _parse_datetime_strptime(date_string_in, return_seconds, assume_local)
+            fields = tt[0:6]
+        else:
+            tt = None
+        if return_seconds:
+            if is_utc and not assume_local:
+                # time.mktime() uses local time, not UTC
+                result = long(round(calendar.timegm(fields)))
+            else:
+                # assume local time for naive time
+                if tt is None:
+                    tt = fields + (0, 1, -1)
+                result = long(round(time.mktime(tt)))
+        elif is_utc:
+            result = datetime(*fields, tzinfo=UTC)
+        else:
+            result = datetime(*fields)
+        self.cache.put(key, result)
+        return result
+
+
+_datetime_parser = DatetimeParser()
+
+
+def parse_datetime(date_string_in, return_seconds=False, assume_local=False):
+    """Parse date/time string and return datetime object.
+
+    This function provides only limited support of the iso8601 format
+    e.g. Time zone specifications (different from Z for UTC) are not supported
+    Can raise ValueError is the format is not valid
+    The most common formats are parsed without strptime, results are memoized (see DatetimeParser)
+
+    :param date_string_in: date/time string in iso8601 (%Y-%m-%dT%H:%M:%S[Z]) format
+        Other formats are accepted: %Y-%m-%d, %Y%m%d[T%H:%M:%S[Z]], %Y-%m-%d %H:%M:%S
+    :param return_seconds: return seconds form the Epoch instead of a datetime object
+    :param assume_local: assume that a naive time is local when returning seconds (cannot express naive time)
+    :return: datetime, None if errors occur
+    """
+    return _datetime_parser.parse(date_string_in, return_seconds, assume_local)
+
+
+def _format_datetime(date_in, iso8601=True):
+    """Format the date as iso8601 or %Y-%m-%d %H:%M:%S. Not cached, see format_datetime
 
     iso8601 datetime is %Y-%m-%dT%H:%M:%SZ for UTC, Z is omitted for
     naive time (only if date_in is a datetime object), +HH:MM is added for other time zones.
@@ -393,6 +569,35 @@ def format_datetime(date_in, iso8601=True):
     return result
 
 
+_format_cache = LRUCache(1024)
+
+
+def format_datetime(date_in, iso8601=True):
+    """Format the date as iso8601 or %Y-%m-%d %H:%M:%S.
+
+    iso8601 datetime is %Y-%m-%dT%H:%M:%SZ for UTC, Z is omitted for
+    naive time (only if date_in is a datetime object), +HH:MM is added for other time zones.
+    Gratia service (collector) expects timestamps with T and Z.
+    Can rise exceptions if times are out of range.
+    Strings for seconds from the Epoch are cached (timestamps repeat a lot).
+
+    :param date_in: date in seconds from the Epoch (float), time-tuple, or datetime object.
+        The first 2 and naive datetime objects are assumed in UTC time.
+        None is considered now.
+    :param iso8601: use the "%Y-%m-%d %H:%M:%S" alternative format if False (default: True)
+    :return: String with formatted date, None if failing
+    """
+    if type(date_in) not in (int, long, float):
+        # datetime objects with different time zones can compare equal, they are not cached
+        return _format_datetime(date_in, iso8601)
+    key = (date_in, iso8601)
+    result = _format_cache.get(key)
+    if result is None:
+        result = _format_datetime(date_in, iso8601)
+        _format_cache.put(key, result)
+    return result
+
+
 def format_interval(time_interval):
     """Format time interval as Duration ISO8601 (PnYnMnDTnHnMnS): http://en.wikipedia.org/wiki/ISO_8601
 
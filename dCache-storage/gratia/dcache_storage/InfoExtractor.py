@@ -0,0 +1,262 @@
+"""
+Streaming extraction of the dCache storage records from the dCache info
+provider document (http://<dCache host>:2288/info).
+
+InfoExtractor reads the document with an incremental expat parser and builds
+the StorageElement and StorageElementRecord objects directly, in the order and
+with the values of the create_se_record.xsl transformation. Only the figures
+that end up in the records are kept: the summary space, one tuple per pool,
+the link groups and the reservation space summed per link group and
+description.
+"""
+
+import re
+import xml.parsers.expat
+
+DCACHE_NS = "http://www.dcache.org/2008/01/Info"
+
+# Element paths (below the dCache root) of the metrics used in the records
+SUMMARY_SPACE = ('summary', 'pools', 'space', 'metric')
+POOL_METRIC = ('pools', 'pool', 'metric')
+POOL_SPACE = ('pools', 'pool', 'space', 'metric')
+VERSION_METRIC = ('domains', 'domain', 'cells', 'cell', 'version', 'metric')
+LINKGROUP_METRIC = ('linkgroups', 'linkgroup', 'metric')
+RESERVATION_METRIC = ('reservations', 'reservation', 'metric')
+RESERVATION_SPACE = ('reservations', 'reservation', 'space', 'metric')
+
+SPACE_METRICS = ('total', 'free', 'used')
+
+_number_re = re.compile(r'^\s*-?(\d+(\.\d*)?|\.\d+)\s*$')
+
+def xpathNumber(text):
+    """Convert a string to a number like the XPath number() function"""
+    if text is None or not _number_re.match(text):
+        return float('nan')
+    return float(text)
+
+def xpathString(value):
+    """Format a number like the XPath string() function"""
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return value > 0 and 'Infinity' or '-Infinity'
+    if value == int(value):
+        return str(int(value))
+    text = repr(value)
+    if 'e' in text:
+        text = ('%.20f' % value).rstrip('0')
+    return text
+
+
+class InfoExtractor:
+    """
+    Build the storage records of a dCache info document.
+    se is the name of the storage element, now the timestamp of the records
+    and pools whether the pools are reported (the nopools parameter of the
+    transformation).
+    """
+
+    def __init__(self, se, now, pools=True, storageElement=None, storageElementRecord=None):
+        if storageElement is None:
+            from gratia.services.StorageElement import StorageElement as storageElement
+        if storageElementRecord is None:
+            from gratia.services.StorageElementRecord import StorageElementRecord as storageElementRecord
+        self.se = se
+        self.now = now
+        self.pools = pools
+        self.StorageElement = storageElement
+        self.StorageElementRecord = storageElementRecord
+
+    def _reset(self):
+        self._path = []
+        self._text = None
+        self._metric = None
+        self._version = None
+        self._summary = {}
+        self._pool = None
+        self._poolList = []       # (name, status, {space}) in document order
+        self._linkgroup = None
+        self._linkgroups = []     # (lgid, name) in document order
+        self._reservation = None
+        self._quotas = []         # (description, link group references) of the first reservation of each description
+        self._quotaSeen = {}
+        self._quotaSpace = {}     # (lgid, description) -> [total, free, used]
+
+    def parse(self, fd):
+        """Parse the info document read from the file object fd"""
+        self._reset()
+        parser = xml.parsers.expat.ParserCreate(namespace_separator=' ')
+        parser.StartElementHandler = self._startElement
+        parser.EndElementHandler = self._endElement
+        parser.CharacterDataHandler = self._characters
+        parser.buffer_text = True
+        parser.ParseFile(fd)
+
+    def extract(self, fd):
+        """Parse the info document read from fd and return the list of records"""
+        self.parse(fd)
+        return self.records()
+
+    def _startElement(self, name, attrs):
+        uri, sep, local = name.rpartition(' ')
+        if uri != DCACHE_NS:
+            local = None
+        path = self._path
+        if not path and local != 'dCache':
+            raise ValueError("Not a dCache info document: %s" % name)
+        path.append(local)
+        path = tuple(path[1:])
+        if local == 'metric':
+            target = None
+            if path == SUMMARY_SPACE:
+                target = self._summary
+            elif path == POOL_METRIC or path == POOL_SPACE:
+                target = self._pool
+            elif path == VERSION_METRIC:
+                if self._version is None:
+                    target = 'version'
+            elif path == LINKGROUP_METRIC:
+                target = self._linkgroup
+            elif path == RESERVATION_METRIC or path == RESERVATION_SPACE:
+                target = self._reservation
+            if target is not None:
+                self._metric = (target, path, attrs.get('name'))
+                self._text = []
+        elif path == ('pools', 'pool'):
+            self._pool = {'name': attrs.get('name', ''), 'space': {}, 'enabled': False, 'heartbeat': False}
+        elif path == ('linkgroups', 'linkgroup'):
+            self._linkgroup = {'lgid': attrs.get('lgid'), 'name': None}
+        elif path == ('reservations', 'reservation'):
+            self._reservation = {'description': None, 'lgrefs': set(),
+                                 'space': dict([(i, []) for i in SPACE_METRICS])}
+
+    def _characters(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def _endElement(self, name):
+        local = self._path[-1]
+        path = tuple(self._path[1:])
+        self._path.pop()
+        if local == 'metric':
+            if self._metric is not None:
+                self._endMetric(''.join(self._text))
+                self._metric = None
+                self._text = None
+        elif path == ('pools', 'pool'):
+            pool = self._pool
+            if pool['enabled'] and pool['heartbeat']:
+                status = 'Production'
+            else:
+                status = 'Closed'
+            if self.pools:
+                self._poolList.append((pool['name'], status, pool['space']))
+            self._pool = None
+        elif path == ('linkgroups', 'linkgroup'):
+            linkgroup = self._linkgroup
+            self._linkgroups.append((linkgroup['lgid'], linkgroup['name'] or ''))
+            self._linkgroup = None
+        elif path == ('reservations', 'reservation'):
+            self._endReservation(self._reservation)
+            self._reservation = None
+
+    def _endMetric(self, value):
+        target, path, name = self._metric
+        if path == SUMMARY_SPACE or path == POOL_SPACE:
+            # value-of selects the first metric of each name
+            space = target
+            if path == POOL_SPACE:
+                space = target['space']
+            if name in SPACE_METRICS and name not in space:
+                space[name] = value
+        elif path == POOL_METRIC:
+            if name == 'enabled' and value == 'true':
+                target['enabled'] = True
+            elif name == 'last-heartbeat' and xpathNumber(value) > 0:
+                target['heartbeat'] = True
+        elif path == VERSION_METRIC:
+            if name == 'release' and value != 'cells':
+                self._version = value
+        elif path == LINKGROUP_METRIC:
+            if name == 'name' and target['name'] is None:
+                target['name'] = value
+        elif path == RESERVATION_METRIC:
+            if name == 'description' and target['description'] is None:
+                target['description'] = value
+            elif name == 'linkgroupref':
+                target['lgrefs'].add(value)
+        elif path == RESERVATION_SPACE:
+            if name in SPACE_METRICS:
+                target['space'][name].append(value)
+
+    def _endReservation(self, reservation):
+        """
+        Sum the space of the reservation into each of its link groups. Like the
+        transformation, a description is reported once, in the link groups of
+        the first reservation that has it.
+        """
+        description = reservation['description']
+        if description is None:
+            return
+        if description not in self._quotaSeen:
+            self._quotaSeen[description] = True
+            self._quotas.append((description, reservation['lgrefs']))
+        for lgid in reservation['lgrefs']:
+            sums = self._quotaSpace.setdefault((lgid, description), [0.0, 0.0, 0.0])
+            for i, metric in enumerate(SPACE_METRICS):
+                for value in reservation['space'][metric]:
+                    sums[i] += xpathNumber(value)
+
+    def _element(self, uniqueId, parentId, name, spaceType, status):
+        se = self.StorageElement()
+        se.UniqueID(uniqueId)
+        se.ParentID(parentId)
+        se.Name(name)
+        se.SE(self.se)
+        se.SpaceType(spaceType)
+        se.Implementation('dCache')
+        se.Version(self._version or '')
+        se.Timestamp(self.now)
+        se.Status(status)
+        return se
+
+    def _record(self, uniqueId, measurementType, total, free, used):
+        ser = self.StorageElementRecord()
+        ser.UniqueID(uniqueId)
+        ser.MeasurementType(measurementType)
+        ser.StorageType('disk')
+        ser.TotalSpace(total)
+        ser.FreeSpace(free)
+        ser.UsedSpace(used)
+        ser.Timestamp(self.now)
+        return ser
+
+    def records(self):
+        """Return the records of the parsed document, in the order of the transformation"""
+        se = self.se
+        seId = '%s:SE:%s' % (se, se)
+        summary = self._summary
+        result = [self._element(seId, seId, se, 'SE', 'Production'),
+                  self._record(seId, 'raw', summary.get('total', ''), summary.get('free', ''),
+                               summary.get('used', ''))]
+
+        for name, status, space in self._poolList:
+            poolId = '%s:Pool:%s' % (se, name)
+            result.append(self._element(poolId, seId, name, 'Pool', status))
+            if status == 'Production':
+                result.append(self._record(poolId, 'raw', space.get('total', ''), space.get('free', ''),
+                                           space.get('used', '')))
+
+        for lgid, name in self._linkgroups:
+            linkId = '%s:Area:%s' % (se, name)
+            result.append(self._element(linkId, seId, name, 'Area', 'Production'))
+            if lgid is None:
+                continue
+            for description, lgrefs in self._quotas:
+                if lgid not in lgrefs:
+                    continue
+                quotaId = '%s:Quota:%s' % (se, description)
+                total, free, used = [xpathString(i) for i in self._quotaSpace[(lgid, description)]]
+                result.append(self._element(quotaId, linkId, description, 'Quota', 'Production'))
+                result.append(self._record(quotaId, 'logical', total, free, used))
+        return result
@@ -23,6 +23,7 @@ from logging.handlers import RotatingFileHandler
 # The gratia probe code
 import gratia.common.Gratia as Gratia
 from gratia.common.probe_config import ProbeConfiguration
+from gratia.common.debug import FlushLog
 # Local modules
 import TestContainer
 from Alarm import Alarm
@@ -151,6 +152,7 @@ def warn_of_signal( signum, frame ):
         logger.critical( "Going down on signal " + str( signum ) );
     if terminationAlarm != None:
         terminationAlarm.event()
+    FlushLog()
     os._exit( 1 )
 
 def main():
@@ -4,7 +4,9 @@
 #
 
 import os,sys,stat
-import time,calendar,string
+import time,calendar,string,datetime
+
+from gratia.common2.logclassifier import LineClassifier, TimestampCache
 
 # returns a dictionary
 # where keys are (monitor_pid,glexec_uid)
@@ -96,12 +98,113 @@ def parse_log(logfile,time_limit):
 
     return out
 
+# Jobs started but not terminated for this long are forgotten
+PENDING_EXPIRATION=30*24*3600
+# Number of bytes at the beginning of the log used to recognize it
+LOG_HEAD_SIZE=256
+
+# Same as parse_log, but reading forward from where the previous call stopped
+# state is a dictionary updated in place, to be saved between calls:
+#   'file'    - identity of the last log read: (inode, first bytes)
+#   'offset'  - byte offset after the last complete line read in that log
+#   'pending' - jobs started and not yet terminated, same format as the returned values
+# If the state does not match the log or its rotated copy (filename.0),
+# parse_log is used once to recover the recent jobs and the running ones.
+# Only terminated jobs are returned
+def parse_log_incremental(logfile,time_limit,state):
+    files=[]
+    old_logfile=logfile+".0"
+    if state.has_key('file'):
+        if match_log_identity(logfile,state['file']):
+            files=[(logfile,state['offset'])]
+        elif match_log_identity(old_logfile,state['file']):
+            # the log was rotated since the last time
+            files=[(old_logfile,state['offset']),(logfile,0)]
+
+    out={}
+    if not files:
+        # no usable state: look back from the end of the log
+        offset=os.stat(logfile)[stat.ST_SIZE]
+        jobs=parse_log(logfile,time_limit)
+        pending={}
+        for id in jobs.keys():
+            if jobs[id].has_key('end'):
+                out[id]=jobs[id]
+            else:
+                pending[id]=jobs[id]
+        state['file']=get_log_identity(logfile)
+        state['offset']=offset
+        state['pending']=pending
+        # lines written while reading back are parsed next time
+        files=[(logfile,offset)]
+
+    pending=state.get('pending',{})
+    latest=time_limit
+    for fname,offset in files:
+        identity=get_log_identity(fname)
+        fd=open(fname,"r")
+        try:
+            if offset>os.fstat(fd.fileno())[stat.ST_SIZE]:
+                offset=0 # truncated in place, start over
+            fd.seek(offset)
+            for line in fd:
+                if line[-1:]!="\n":
+                    break # still being written, get it next time
+                offset+=len(line)
+                try:
+                    date,id,message=parse_line(line[:-1])
+                except:
+                    continue # skip malformed lines
+                if date>latest:
+                    latest=date
+                if pending.has_key(id):
+                    el=pending[id]
+                elif message[:7]=="Started":
+                    el={}
+                    pending[id]=el
+                else:
+                    continue # job started before the lines read so far, cannot be accounted
+                try:
+                    update_element(el,date,message,forward=True)
+                except:
+                    continue # skip malformed lines
+                if el.has_key('end'):
+                    del pending[id]
+                    if el.has_key('start') and el['end']>=time_limit:
+                        out[id]=el
+        finally:
+            fd.close()
+        state['file']=identity
+        state['offset']=offset
+
+    # forget jobs that will never terminate
+    for id in pending.keys():
+        if pending[id].get('start',0)<latest-PENDING_EXPIRATION:
+            del pending[id]
+    state['pending']=pending
+    return out
+
 #####################################################
 #
 # I N T E R N A L - Do not use
 #
 #####################################################
 
+def get_log_identity(fname):
+    fd=open(fname,"r")
+    try:
+        return (os.fstat(fd.fileno())[stat.ST_INO],fd.read(LOG_HEAD_SIZE))
+    finally:
+        fd.close()
+
+def match_log_identity(fname,identity):
+    if not os.access(fname,os.R_OK):
+        return False
+    inode,head=identity
+    current_inode,current_head=get_log_identity(fname)
+    # the head may have been shorter than LOG_HEAD_SIZE when saved
+    return inode==current_inode and current_head.startswith(head)
+
 # This class mimics a File object
 # but reads lines from back to the beginning
 # it also automatically moves to filename.0 when
@@ -202,8 +305,20 @@ def parseISO8601(datestr):
     else:
       return parseISO8601_Local(datestr)
 
+def parseSyslogDate(datestr):
+    #syslog doesn't have year, so we have to guess year ourselves 
+    now=datetime.datetime.now()
+    ts=time.strptime("%s %s"% (now.year,datestr),"%Y %b %d %H:%M:%S")
+    if time.mktime(ts)>time.mktime(now.timetuple()):
+        #we are in new year already, get a previous year
+        ts=time.strptime("%s %s"% (now.year-1,datestr),"%Y %b %d %H:%M:%S")
+    return time.mktime(ts)
+
+# many lines share the same second, convert each date only once
+iso8601_dates=TimestampCache(parseISO8601)
+syslog_dates=TimestampCache(parseSyslogDate)
+
 def parse_line_v3(line):
-    import datetime
     #syslog type of message
     #<LOCAL_DATE> hostname glexec.mon[<monitor_id>#<glexec_id>]: message\n
     indx=line.find("glexec.mon[")
@@ -212,13 +327,7 @@ def parse_line_v3(line):
     if len(tmp) >= 4:
         tmp = " ".join(info[:4])
     datestr=tmp[:tmp.rfind(" ")]
-    #syslog doesn't have year, so we have to guess year ourselves 
-    now=datetime.datetime.now()
-    ts=time.strptime("%s %s"% (now.year,datestr.strip()),"%Y %b %d %H:%M:%S")
-    if time.mktime(ts)>time.mktime(now.timetuple()):
-	#we are in new year already, get a previous year
-        ts=time.strptime("%s %s"% (now.year-1,datestr.strip()),"%Y %b %d %H:%M:%S")
-    date=time.mktime(ts)
+    date=syslog_dates(datestr.strip())
     tmp=line[indx:].strip()
     message=tmp[tmp.find(":")+1:].strip()
     tmp=line[indx+1:line.find("]:")]
@@ -234,22 +343,26 @@ def parse_line_v2(line):
     mon_str,gl_str=header.split('#',1)
     datestr,message=messageWdate.split(' ',1)
 
-    date=parseISO8601(datestr)
+    date=iso8601_dates(datestr)
 
     return (long(date),(int(mon_str),int(gl_str)),message)
 
+# the log formats, recognized by a literal before trying to parse the line
+line_formats=LineClassifier()
+line_formats.add_rule(parse_line_v1,'[')
+line_formats.add_rule(parse_line_v2,'glemon[')
+line_formats.add_rule(parse_line_v3,'glexec.mon[',anchored=False)
+
 def parse_line(line):
-    if line[0]=='[':
-      return parse_line_v1(line)
-    else:
-      if line.find("glemon")==0:
-      	return parse_line_v2(line)
-      else:
-      	return parse_line_v3(line)
+    parser,match=line_formats.classify(line)
+    if parser is None:
+        raise RuntimeError,"Not a glexec monitor line (%s)"%line
+    return parser(line)
 
 	
 
-def update_element(el,date,msg):
+# forward is True when the lines are read from the oldest to the newest
+def update_element(el,date,msg,forward=False):
     msg7=msg[:7]
     if msg7=="Started":
         el["start"]=date
@@ -267,7 +380,8 @@ def update_element(el,date,msg):
     elif msg7=="Used VO":
         el["VO"]=string.split(msg[10:],'"',1)[0]
     elif msg7=="Used FQ":
-        el["FQAN"]=msg[12:-1] # if there are many listed, the oldest will prevail
+        if not (forward and el.has_key("FQAN")):
+            el["FQAN"]=msg[12:-1] # if there are many listed, the oldest will prevail
     elif msg7=="Termina":
         el["end"]=date
         el["usercpu"]=1
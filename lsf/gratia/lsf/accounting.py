@@ -170,15 +170,35 @@ class TermInfo:
         self.number = int(TERMINFO[id]['number'])
 
 
+## Attributes of JobFinishEvent decoded lazily (all but the event type, version and time)
+LAZY_FIELDS = ('jobID', 'userId', 'options', 'numProcessors', 'submitTimeEpoch', 'submitTime', 'beginTimeEpoch',
+               'beginTime', 'termTimeEpoch', 'termTime', 'startTimeEpoch', 'startTime', 'userName', 'queue',
+               'resReq', 'dependCond', 'preExecCmd', 'fromHost', 'cwd', 'inFile', 'outFile', 'errFile', 'jobFile',
+               'numAskedHosts', 'askedHosts', 'numExHosts', 'execHosts', 'jStatus', 'hostFactor', 'jobName',
+               'command', 'utime', 'stime', 'maxrss', 'ixrss', 'ismrss', 'idrss', 'isrss', 'minflt', 'majflt',
+               'nswap', 'inblock', 'oublock', 'ioch', 'msgsnd', 'msgrcv', 'nsignals', 'nvcsw', 'nivcsw', 'exutime',
+               'mailUser', 'projectName', 'exitStatus', 'maxNumProcessors', 'loginShell', 'timeEvent', 'idx',
+               'maxRMem', 'maxRSwap', 'inFileSpool', 'commandSpool', 'rsvId', 'sla', 'exceptMask',
+               'additionalInfo', 'termInfo', 'warningAction', 'warningTimePeriod', 'chargedSAAP', 'licenseProject',
+               'runTime', 'waitTime', 'pendTime')
+_LAZY_FIELDS_SET = frozenset(LAZY_FIELDS)
+
+
 ## Represents a JOB_FINISH event in the lsb accounting file and provides attributes and methods
 #  to access and manipulate the data accordingly.
-class JobFinishEvent:
+#  Only the event type, version and time are decoded when the object is created
+#  (enough to compare the record with a checkpoint), the other fields are decoded
+#  all at once by decode(), called implicitly the first time one of them is used.
+class JobFinishEvent(object):
+    __slots__ = ('fileLineNumber', 'eventType', 'version', 'eventTimeEpoch', 'eventTime', '_row') + \
+        LAZY_FIELDS
+
     def __init__(self, row=[], file_line=-1):
         # MMDB
         #print row
 
         # If the first entry isn't JOB_FINISH, then its the wrong type of accounting entry
-        if not row[0] == "JOB_FINISH":
+        if len(row) < 3 or not row[0] == "JOB_FINISH":
             raise ValueError("Invalid LSF accounting record: %s" % (row,))
 
         ## The line within the accounting file, if passed to the constructor
@@ -190,88 +210,106 @@ class JobFinishEvent:
         #  determine which type of event has been logged.
         #\returns The type of event as a string, for JobFinishEvent this is 
         #  always JOB_FINISH
-        self.eventType = row.pop(0)
+        self.eventType = row[0]
 
         ## Version number of the log file format.  This corresponds the the 
         #  version of LSF used on the cluster.  
         #\returns The LSF Version number as a string.
-        self.version = row.pop(0)
+        self.version = row[1]
 
         ## The epoch time the event was generated (The time the job finished.)
         #\returns The time the event was generated in seconds since epoch as 
         # an integer.
-        self.eventTimeEpoch = float(row.pop(0))
+        self.eventTimeEpoch = float(row[2])
 
         ## A datetime object for the time the event was generated (The time 
         #  the job finished)
         #\returns A datetime object.
         self.eventTime = datetime.datetime.utcfromtimestamp(self.eventTimeEpoch)
 
+        ## The raw fields not decoded yet (None once decoded)
+        self._row = row
+
+    ## Decode all the fields of the record (if not done already).
+    #  Raises ValueError if the record is malformed.
+    def decode(self):
+        row = self._row
+        if row is None:
+            return
+        # fields after the event time, in order
+        next_field = iter(row[3:]).next
+        try:
+            self._decode_fields(next_field)
+        except StopIteration:
+            raise ValueError("Truncated LSF accounting record: %s" % (row,))
+        self._row = None
+
+    def _decode_fields(self, next_field):
         ## The ID number of the job.
         #\returns Job ID as integer
-        self.jobID = int(row.pop(0))
+        self.jobID = int(next_field())
 
         ## The numeric user ID of the user who owned the job.
         #\returns The numeric user id as an integer
-        self.userId = int(row.pop(0))
+        self.userId = int(next_field())
 
         ## Bit flags for job processing
-        self.options = row.pop(0)
+        self.options = next_field()
 
         ## Number of processors initially requested for execution.
-        self.numProcessors = int(row.pop(0))
+        self.numProcessors = int(next_field())
 
         ## The epoch time when the job was submitted.
-        self.submitTimeEpoch = float(row.pop(0))
+        self.submitTimeEpoch = float(next_field())
 
         ## A datetime object for when the job was submitted.
         self.submitTime = datetime.datetime.utcfromtimestamp(self.submitTimeEpoch)
 
         ## The epoch time when the job can be started, Job start time . the job should be started at or after this time
-        self.beginTimeEpoch = float(row.pop(0))
+        self.beginTimeEpoch = float(next_field())
 
         ## A datetime object for the job start time, the job should be started at or after this time.
         self.beginTime = datetime.datetime.utcfromtimestamp(self.beginTimeEpoch)
 
         ## The epoch time of the Job termination deadline. the job should be terminated by this time.
-        self.termTimeEpoch = float(row.pop(0))
+        self.termTimeEpoch = float(next_field())
 
         self.termTime = datetime.datetime.utcfromtimestamp(self.termTimeEpoch)
 
-        self.startTimeEpoch = float(row.pop(0))
+        self.startTimeEpoch = float(next_field())
         self.startTime = datetime.datetime.utcfromtimestamp(self.startTimeEpoch)
 
         ### item 12 in line (line[11])
         ## The user name of the submitter.
         #\returns User Name as string.
-        self.userName = row.pop(0)
+        self.userName = next_field()
 
         ## Name of the job queue to which the job was submitted
         #\returns Queue name as string
-        self.queue = row.pop(0)
+        self.queue = next_field()
 
         ## Needs some more work...
-        self.resReq = row.pop(0)
+        self.resReq = next_field()
 
-        self.dependCond = row.pop(0)
+        self.dependCond = next_field()
         
-        self.preExecCmd = row.pop(0)
+        self.preExecCmd = next_field()
         
-        self.fromHost = row.pop(0)
+        self.fromHost = next_field()
         
-        self.cwd = row.pop(0)
+        self.cwd = next_field()
         
-        self.inFile = row.pop(0)
+        self.inFile = next_field()
         
-        self.outFile = row.pop(0)
+        self.outFile = next_field()
         
-        self.errFile = row.pop(0)
+        self.errFile = next_field()
         
-        self.jobFile = row.pop(0)
+        self.jobFile = next_field()
         
         ### item 23 in line (line[22])
         ## Number of host names to which job dispatching will be limited
-        self.numAskedHosts = int(row.pop(0))
+        self.numAskedHosts = int(next_field())
         
         ## List of host names to which job dispatching will be limited. Nothing 
         #  is logged to the record for this value if the value of numAskedHosts
@@ -286,13 +324,13 @@ class JobFinishEvent:
         i = self.numAskedHosts
         while i > 0:
             i -= 1
-            self.askedHosts.append(row.pop(0))
+            self.askedHosts.append(next_field())
 
         ## Number of processors used for execution.  If 
         #  LSF_HPC_EXTENSIONS="SHORT_EVENTFILE" is specified in lsf.conf, the 
         #  value of this field is the number of .hosts listed in the execHosts 
         #  field.
-        self.numExHosts = int(row.pop(0))
+        self.numExHosts = int(next_field())
 
         ## List of execution host names (%s for each).  Nothing is logged to the
         #  record for this value if the last field value is 0.
@@ -309,23 +347,23 @@ class JobFinishEvent:
         i = self.numExHosts
         while i > 0:
             i -= 1
-            self.execHosts.append(row.pop(0))
+            self.execHosts.append(next_field())
 
         ### ITEM 25 in line (line[24]) + ask_host + exe_host
         ## Job status. The number 32 represents EXIT, 64 represents DONE.
-        self.jStatus = int(row.pop(0))
+        self.jStatus = int(next_field())
 
         ## CPU factor of the first execution host.
-        self.hostFactor = float(row.pop(0))
+        self.hostFactor = float(next_field())
         
         ## Job name (up to 4094 characters).
-        self.jobName = row.pop(0)
+        self.jobName = next_field()
 
         ## Complete batch job command specified by the user (up to 4094
         #  characters for UNIX or 512 characters for Windows).
-        self.command = row.pop(0)
+        self.command = next_field()
 
-        sec = float(row.pop(0))
+        sec = float(next_field())
         if sec < 0:
             sec = 0
         ## User time used in seconds.  If the value of some field is 
@@ -334,7 +372,7 @@ class JobFinishEvent:
         #  are measured in KB.
         self.utime = datetime.timedelta(seconds=sec)
 
-        sec = float(row.pop(0))
+        sec = float(next_field())
         if sec < 0:
             sec = 0
         ## System time used in seconds.  If the value of some field is 
@@ -347,157 +385,157 @@ class JobFinishEvent:
         #  unavailable (due to job exit or the difference among the operating 
         #  systems), -1 will be logged. Times are measured in seconds, 
         #  and sizes are measured in KB.
-        self.maxrss = row.pop(0)
+        self.maxrss = next_field()
 
         ## Integral of the shared text size over time. (in KB Seconds)  If the 
         #  value of some field is unavailable (due to job exit or the difference 
         #  among the operating systems), -1 will be logged. Times are measured 
         #  in seconds, and sizes are measured in KB.
-        self.ixrss = row.pop(0)
+        self.ixrss = next_field()
         
         ## Integral of the shared memory size over time. (valid only on Ultrix)
         #  If the value of some field is unavailable (due to job exit or the
         #  difference among the operating systems), -1 will be logged. Times 
         #  are measured in seconds, and sizes are measured in KB. 
-        self.ismrss = row.pop(0)
+        self.ismrss = next_field()
         
         ## Integral of the unshared data size over time.  If the value of some
         #  field is unavailable (due to job exit or the difference among the
         #  operating systems), -1 will be logged. Times are measured in seconds,
         #  and sizes are measured in KB. 
-        self.idrss = row.pop(0)
+        self.idrss = next_field()
         
         ## Integral of the unshared stack size over time.  If the value of some
         #  field is unavailable (due to job exit or the difference among the
         #  operating systems), -1 will be logged. Times are measured in seconds,
         #  and sizes are measured in KB. 
-        self.isrss = row.pop(0)
+        self.isrss = next_field()
         
         ## Number of page reclaims.  If the value of some field is unavailable 
         #  (due to job exit or the difference among the operating systems),
         #  -1 will be logged. Times are measured in seconds, and sizes are
         #  measured in KB. 
-        self.minflt = row.pop(0)
+        self.minflt = next_field()
         
         ## Number of page faults.  If the value of some field is unavailable 
         #  (due to job exit or the difference among the operating systems), -1 
         #  will be logged. Times are measured in seconds, and sizes are measured
         #  in KB. 
-        self.majflt = row.pop(0)
+        self.majflt = next_field()
 
         ## Number of times the process was swapped out.  If the value of some
         #  field is unavailable (due to job exit or the difference among the
         #  operating systems), -1 will be logged. Times are measured in seconds,
         #  and sizes are measured in KB. 
-        self.nswap = row.pop(0)
+        self.nswap = next_field()
 
         ## Number of block input operations.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.inblock = row.pop(0)
+        self.inblock = next_field()
         
         ## Number of block output operations.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.oublock = row.pop(0)
+        self.oublock = next_field()
         
         ### ITEM 41 in line (line[40]) + ask_host + exe_host
         ## Number of characters read and written. (valid only on HP-UX)  If the
         #  value of some field is unavailable (due to job exit or the difference
         #  among the operating systems), -1 will be logged. Times are measured
         #  in seconds, and sizes are measured in KB. 
-        self.ioch = row.pop(0)
+        self.ioch = next_field()
         
         ## Number of System V IPC messages sent.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.msgsnd = row.pop(0)
+        self.msgsnd = next_field()
         
         ## Number of messages received.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.msgrcv = row.pop(0)
+        self.msgrcv = next_field()
         
         ## Number of signals received.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.nsignals = row.pop(0)
+        self.nsignals = next_field()
         
         ## Number of voluntary context switches.  If the value of some field is
         #  unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.nvcsw = row.pop(0)
+        self.nvcsw = next_field()
         
         ## Number of involuntary context switches.  If the value of some field
         #  is unavailable (due to job exit or the difference among the operating
         #  systems), -1 will be logged. Times are measured in seconds, and sizes
         #  are measured in KB. 
-        self.nivcsw = row.pop(0)
+        self.nivcsw = next_field()
         
         ### ITEM 47 in line (line[46]) + ask_host + exe_host
         ## Exact user time used. (valid only on ConvexOS)  If the value of some
         #  field is unavailable (due to job exit or the difference among the
         #  operating systems), -1 will be logged. Times are measured in seconds,
         #  and sizes are measured in KB. 
-        self.exutime = row.pop(0)
+        self.exutime = next_field()
 
         ## Name of the user to whom job related mail was sent
-        self.mailUser = row.pop(0)
+        self.mailUser = next_field()
 
         ## LSF project name.
-        self.projectName = row.pop(0)
+        self.projectName = next_field()
 
         ## UNIX exit status of the job
-        self.exitStatus = int(row.pop(0))
+        self.exitStatus = int(next_field())
 
         ## Maximum number of processors specified for the job.
-        self.maxNumProcessors = int(row.pop(0))
+        self.maxNumProcessors = int(next_field())
 
         ## Login shell used for the job
-        self.loginShell = row.pop(0)
+        self.loginShell = next_field()
 
-        self.timeEvent = row.pop(0)
+        self.timeEvent = next_field()
         
-        self.idx = row.pop(0)
+        self.idx = next_field()
         
         ### ITEM 55 in line (line[54]) + ask_host + exe_host
-        self.maxRMem = row.pop(0)
+        self.maxRMem = next_field()
         
-        self.maxRSwap = row.pop(0)
+        self.maxRSwap = next_field()
         
-        self.inFileSpool = row.pop(0)
+        self.inFileSpool = next_field()
         
-        self.commandSpool = row.pop(0)
+        self.commandSpool = next_field()
         
-        self.rsvId = row.pop(0)
+        self.rsvId = next_field()
         
-        self.sla = row.pop(0)
+        self.sla = next_field()
         
-        self.exceptMask = row.pop(0)
+        self.exceptMask = next_field()
         
-        self.additionalInfo = row.pop(0)
+        self.additionalInfo = next_field()
         
         ### ITEM 63 in line (line[62]) + ask_host + exe_host
-        i = row.pop(0)
+        i = next_field()
         
         self.termInfo = TermInfo(i)
         
-        self.warningAction = row.pop(0)
+        self.warningAction = next_field()
         
-        self.warningTimePeriod = row.pop(0)
+        self.warningTimePeriod = next_field()
         
         ## The Share Attribute Account Path (SAAP) that was charged for the job
         #  under fair share scheduling.
-        self.chargedSAAP = row.pop(0)
+        self.chargedSAAP = next_field()
         
         ### ITEM 67 in line (line[66]) + ask_host + exe_host
-        self.licenseProject = row.pop(0)
+        self.licenseProject = next_field()
 
         if self.startTimeEpoch < 1:
             # job never started
@@ -515,12 +553,27 @@ class JobFinishEvent:
         ## The time the job was pending.  
         self.pendTime = self.waitTime
 
+    def __getattr__(self, name):
+        # Called only for the attributes not set yet: decode the lazy fields on first use
+        if name in _LAZY_FIELDS_SET and self._row is not None:
+            self.decode()
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    def as_dict(self):
+        self.decode()
+        retv = {}
+        for name in self.__slots__:
+            if name[0] != '_':
+                retv[name] = getattr(self, name)
+        return retv
+
     # TODO: add tostring to print one-liners in log files
     def __str__(self):
-        return repr(self.__dict__)
+        return repr(self.as_dict())
 
     def __repr__(self):
-        return repr(self.__dict__)
+        return repr(self.as_dict())
 
 
 ## Parses the LSB accounting file, and returns an iterator that can be used to
@@ -553,9 +606,24 @@ class AcctFile:
     ## Initializer is called with an open file handle object opened to the 
     #  lsb accounting file.
     #\param fh An open file object to the accounting file.
-    def __init__(self, fh):
-        self.reader = csv.reader(fh, delimiter=' ', quotechar='"')
-        self.line_counter = 0
+    #\param line_counter Line number of the current position of fh (when resuming from an offset).
+    # Only complete lines (terminated by a newline) are read, a record still being written
+    # is left for the following reading. offset is the position after the last record returned.
+    def __init__(self, fh, line_counter=0):
+        self.fh = fh
+        self.offset = fh.tell()
+        self.reader = csv.reader(self._complete_lines(), delimiter=' ', quotechar='"')
+        self.line_counter = line_counter
+
+    def _complete_lines(self):
+        # readline (not the file iterator) keeps fh.tell() consistent
+        readline = self.fh.readline
+        while True:
+            line = readline()
+            if not line.endswith('\n'):
+                return
+            self.offset += len(line)
+            yield line
 
     def __iter__(self):
         return self
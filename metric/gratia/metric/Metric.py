@@ -23,7 +23,7 @@ class MetricRecord(record.Record):
     def __init__(self):
         # Initializer
         super(self.__class__, self).__init__()
-        DebugPrint(1, "Creating a metric Record "+utils.TimeToString())
+        DebugPrint(1, "Creating a metric Record "+record.RecordCreateTime())
 
     def Print(self) :
         DebugPrint(3, "Metric Record: ", self)
@@ -44,9 +44,7 @@ class MetricRecord(record.Record):
         self.XmlData.append("<MetricRecord xmlns:urwg=\"http://www.gridforum.org/2003/ur-wg\">\n")
 
         # Add the record indentity
-        self.XmlData.append("<RecordIdentity urwg:recordId=\""+socket.getfqdn()+":"+
-                            str(global_state.RecordPid)+"."+str(record.RecordId)+"\" urwg:createTime=\""+utils.TimeToString(time.gmtime())+"\" />\n")
-        record.RecordId += 1
+        self.XmlData.append(self.XmlRecordIdentity())
 
         for data in self.RecordData:
             self.XmlData.append("\t")
@@ -4,29 +4,151 @@
 import time
 import sys
 import os
+import re
+
+try:
+    import json
+except ImportError:
+    json = None
+try:
+    from ast import literal_eval
+except ImportError:
+    literal_eval = None
 
 from VMRecord import VMRecord
 
+# First line of the files written by query_one_lite.rb with one record per line
+RECORDS_HEADER = "#query_one_lite.rb records"
+
+def _to_str(value):
+    """Convert the unicode strings decoded by json to str, like in the old format"""
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_str(i) for i in value]
+    if isinstance(value, dict):
+        return dict([(_to_str(k), _to_str(v)) for k, v in value.items()])
+    return value
+
+def parseRecordLine(line):
+    """
+    Parse a line of the record format: [id, {info}] in JSON, or id: {info} as
+    a Python literal if query_one_lite.rb had no JSON library.
+    Return the (id, info) pair, None for empty lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] == '[':
+        if json is None:
+            raise Exception("The json module is needed to read JSON records")
+        key, info = json.loads(line)
+        return _to_str(key), _to_str(info)
+    return _literal_item(line)
+
+def _literal_item(text):
+    """Evaluate "key: value" as a Python literal (no code is executed), return (key, value)"""
+    if literal_eval is None:
+        raise Exception("The ast module is needed to read the old query_one format")
+    item = literal_eval("{%s}" % text)
+    if len(item) != 1:
+        raise ValueError("Not a single VM record: %s..." % text[:80])
+    return item.items()[0]
+
+_special_re = re.compile(r'["\\{}\[\],]')
+
+def iterLegacyRecords(fd, bufsize=2**16):
+    """
+    Yield the (id, info) items of the old query_one format, a Ruby hash
+    printed as a Python dictionary literal ({id: {info}, id: {info}, ...}),
+    one top-level item at a time and without evaluating code.
+    """
+    depth = 0
+    in_string = False
+    skip = -1   # position of the character escaped by a backslash
+    item = []
+    while True:
+        buf = fd.read(bufsize)
+        if not buf:
+            break
+        start = 0
+        for m in _special_re.finditer(buf):
+            i = m.start()
+            if i == skip:
+                continue
+            c = buf[i]
+            if in_string:
+                if c == '\\':
+                    skip = i + 1
+                elif c == '"':
+                    in_string = False
+                continue
+            if c == '"':
+                in_string = True
+            elif c in '{[':
+                depth += 1
+                if depth == 1:
+                    # opening brace of the top-level dictionary
+                    start = i + 1
+            elif c in '}]':
+                depth -= 1
+                if depth == 0:
+                    item.append(buf[start:i])
+                    text = ''.join(item).strip()
+                    item = []
+                    if text:
+                        yield _literal_item(text)
+                    start = i + 1
+            elif c == ',' and depth == 1:
+                item.append(buf[start:i])
+                text = ''.join(item).strip()
+                item = []
+                if text:
+                    yield _literal_item(text)
+                start = i + 1
+        if depth > 0:
+            item.append(buf[start:])
+        # a backslash at the end of the buffer escapes the first character of the next one
+        skip = skip - len(buf)
+    if depth != 0 or in_string:
+        raise ValueError("Truncated query_one file")
+
 class OneReader:
     def __init__(self,fn,verbose=False):
         self.fn=fn
         self.vms={}
-	self.verbose=verbose
+        self.verbose=verbose
         self.start=time.time()
-    def readFile(self):
-	if not self.fn or not os.path.isfile(self.fn) or not os.access(self.fn, os.R_OK):
-		raise Exception("One_query file, %s , does not exist." % self.fn)
+    def iterRecords(self):
+        """
+        Yield the (id, VMRecord) pairs of the query_one file one at a time,
+        in either the record per line format or the old dictionary format.
+        """
+        if not self.fn or not os.path.isfile(self.fn) or not os.access(self.fn, os.R_OK):
+            raise Exception("One_query file, %s , does not exist." % self.fn)
         fd=open(self.fn,'r')
-        tmp=eval(fd.read())
-        for key,value in tmp.items():
-            if self.verbose:
-		print >> sys.stdout, "Processing VM #%s: %s" % ( key, value)
-            vm=VMRecord(key,value)
+        try:
+            first=fd.readline()
+            if first.startswith(RECORDS_HEADER):
+                items=(parseRecordLine(line) for line in fd)
+            else:
+                fd.seek(0)
+                items=iterLegacyRecords(fd)
+            for item in items:
+                if item is None:
+                    continue
+                key,value=item
+                if self.verbose:
+                    print >> sys.stdout, "Processing VM #%s: %s" % ( key, value)
+                yield key,VMRecord(key,value)
+        finally:
+            fd.close()
+    def readFile(self):
+        for key,vm in self.iterRecords():
             self.vms[key]=vm
     def getRecords(self):
-        return self.vms       
+        return self.vms
     def dump(self):
-	import pprint
 	for key,vm in self.vms.items():
 		vm.dump()
 
@@ -55,6 +177,6 @@ if __name__ == "__main__":
       print >> sys.stderr, str(e)
       sys.exit(1)
    sys.exit(0)
-            
-            
-        
+
+
+
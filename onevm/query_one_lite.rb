@@ -23,6 +23,12 @@ $: << RUBY_LIB_LOCATION
 require 'pp'
 require 'optparse'
 require 'singleton'
+begin
+	require 'json'
+	JSON_AVAILABLE = true
+rescue LoadError
+	JSON_AVAILABLE = false
+end
 begin
 	require 'opennebula'
 	require 'opennebula/pool'
@@ -546,22 +552,29 @@ def version_string()
 end
 
 
-def format_results(vms)
-    ovms = {}
-    vms.each_key() do |id|
-        ovms[id] = vms[id].info
+# Header of the output file, one VM record per line follows
+RECORDS_HEADER = "#query_one_lite.rb records 1"
+
+# One VM record: [id, info] in JSON or, without the json library,
+# id: info as a Python literal (the old format of each VM)
+def format_record(id, info)
+    if JSON_AVAILABLE
+        return JSON.generate([id, info])
     end
-    return ovms.inspect().gsub("=>", ": ").gsub("nil", "None")
+    return "#{id.inspect()}: #{info.inspect()}".gsub("=>", ": ").gsub("nil", "None")
 end
 
 
-def output_results(results, file)
-    outfile = File.new(file, "w")
-    old = $stdout
-    $stdout = outfile
-    puts results
+def output_results(vms, file)
+    # Write to a temporary file and rename, the probe never sees a partial file
+    tmpfile = file + ".tmp"
+    outfile = File.new(tmpfile, "w")
+    outfile.puts(RECORDS_HEADER)
+    vms.keys().sort().each() do |id|
+        outfile.puts(format_record(id, vms[id].info))
+    end
     outfile.close()
-    $stdout = old
+    File.rename(tmpfile, file)
 end
 
 
@@ -838,7 +851,7 @@ if vms.size() < 1
     exit 99
 end
 
-output_results(format_results(vms), outputfile)
+output_results(vms, outputfile)
 
 result_cache = OpenNebulaSensorCache.new(
                    rtime=Time.now().to_i(), stime=stime,
@@ -0,0 +1,112 @@
+"""
+Common base of the Gratia service records (StorageElement,
+StorageElementRecord, ComputeElement, ComputeElementRecord and Subcluster).
+
+Each record class lists its fields once, in Fields, as (name, kind, doc)
+tuples, and gets a setter method per field:
+    TEXT    the value is used as is
+    STRING  the value is converted with str()
+    TIME    seconds since epoch or a string formated as xsd:dateTime; each
+            call adds an element, the previous values are kept
+The other setters replace the previous value of their field.
+
+SerializeBatch returns many records at once, as one bundle (RecordEnvelope)
+instead of one document per record.
+"""
+
+import time
+import types
+import threading
+
+import gratia.common.xml_utils as xml_utils
+import gratia.common.record as record
+import gratia.common.utils as utils
+
+from gratia.common.debug import DebugPrint
+
+TEXT = 0
+STRING = 1
+TIME = 2
+
+XML_INTRO = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+# Last Timestamp conversion of each thread: seconds since epoch and value
+__timestamp__ = threading.local()
+
+def TimeValue(value):
+    '''Return the xsd:dateTime of a Timestamp (the last conversion of the thread is cached)'''
+
+    if isinstance(value, types.StringType):
+        return value
+    cache = __timestamp__
+    if getattr(cache, 'seconds', None) != value:
+        cache.value = utils.TimeToString(time.gmtime(value))
+        cache.seconds = value
+    return cache.value
+
+def FieldSetter(name, kind, doc):
+    '''Return the setter method of a field'''
+
+    if kind == TIME:
+        def setter(self, value):
+            self.RecordData.Append(name, '', xml_utils.escapeXML(TimeValue(value)))
+    elif kind == STRING:
+        def setter(self, value):
+            self.RecordData.Replace(name, '', xml_utils.escapeXML(str(value)))
+    else:
+        def setter(self, value):
+            self.RecordData.Replace(name, '', xml_utils.escapeXML(value))
+    setter.__name__ = name
+    setter.__doc__ = doc
+    return setter
+
+class ServiceRecordType(type):
+    '''Add the setters of the Fields and the xml start and end tags to the record classes'''
+
+    def __init__(cls, name, bases, members):
+        super(ServiceRecordType, cls).__init__(name, bases, members)
+        for field, kind, doc in members.get('Fields', ()):
+            if field not in members:
+                setattr(cls, field, FieldSetter(field, kind, doc))
+        if cls.RecordType:
+            cls.XmlStart = '<' + cls.RecordType + ' xmlns:urwg="http://www.gridforum.org/2003/ur-wg">\n'
+            cls.XmlEnd = '</' + cls.RecordType + '>\n'
+
+class ServiceRecord(record.Record):
+    "Base class for the Gratia service records"
+
+    __metaclass__ = ServiceRecordType
+
+    # The xml element of the record and its fields, set by the sub-classes
+    RecordType = None
+    Fields = ()
+
+    def __init__(self):
+        # Initializer
+        super(ServiceRecord, self).__init__()
+        DebugPrint(0, "Creating a " + self.RecordType + " Record" + record.RecordCreateTime())
+
+    def Print(self):
+        DebugPrint(1, self.RecordType + ": ", self)
+
+    def XmlBody(self):
+        '''Return the xml of the record without the xml declaration'''
+
+        self.XmlAddMembers()
+        xml = [self.XmlStart, self.XmlRecordIdentity()]
+        for data in self.RecordData:
+            xml.append('\t' + data + '\n')
+        xml.append(self.XmlEnd)
+        return ''.join(xml)
+
+    def XmlCreate(self):
+        self.XmlData = [XML_INTRO + self.XmlBody()]
+
+def SerializeBatch(records):
+    '''Return the xml of the records as a single bundle (RecordEnvelope)'''
+
+    xml = [XML_INTRO, '<RecordEnvelope>\n']
+    for rec in records:
+        xml.append(rec.XmlBody())
+    xml.append('</RecordEnvelope>')
+    return ''.join(xml)
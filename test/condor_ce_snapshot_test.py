@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Check that concurrent probes share one Condor-CE query (gratia.common.condor_ce
+queryJob and JobSnapshot) and that certinfo files are created only for the jobs
+looked up. A fake condor_ce_q counts its invocations.
+
+Run from a checkout, e.g.:
+    python test/condor_ce_snapshot_test.py
+"""
+
+import os
+import sys
+import time
+import glob
+import shutil
+import tempfile
+import subprocess
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOBS = 2000
+
+FAKE_CONDOR_Q = """#!/bin/sh
+echo run >> %(tmp)s/invocations
+sleep 1
+i=0
+while [ $i -lt %(jobs)d ]; do
+    printf 'GlobalJobId=ce.example.org#%%d.0#1338817391\\tx509UserProxyVOName=cms\\t' $i
+    printf 'x509UserProxyFirstFQAN=/cms/Role=NULL/Capability=NULL\\tx509userproxysubject=/DC=org/CN=User %%d\\t' $i
+    printf 'GridJobId=batch pbs ce.example.org#%%d.0#1338817391 pbs/20120604/%%d.ce.example.org\\n' $i $i
+    i=$((i+1))
+done
+"""
+
+# Probe process: look up a few jobs, print the VO of each
+PROBE = """
+import sys
+sys.path.insert(0, '%(top_dir)s/common')
+import gratia.common.config as config
+import gratia.common.condor_ce as condor_ce
+
+class TestConfig:
+    def get_CondorCEHistoryFolder(self):
+        return '%(tmp)s/history'
+    def get_WorkingFolder(self):
+        return '%(tmp)s/tmp'
+    def get_DataFolder(self):
+        return '%(tmp)s/data'
+    def get_CondorCESnapshotTTL(self):
+        return int(sys.argv[1])
+    def get_DebugLevel(self):
+        return 0
+    def get_LogLevel(self):
+        return 0
+
+config.Config = TestConfig()
+for jobid in sys.argv[2:]:
+    print jobid, condor_ce.queryJob(jobid).get('VO')
+"""
+
+
+class Test:
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp()
+        for subdir in ['bin', 'history', 'tmp', 'data']:
+            os.mkdir(os.path.join(self.tmp, subdir))
+        fake = os.path.join(self.tmp, 'bin', 'condor_ce_q')
+        open(fake, 'w').write(FAKE_CONDOR_Q % {'tmp': self.tmp, 'jobs': JOBS})
+        os.chmod(fake, 0755)
+        self.env = dict(os.environ)
+        self.env['PATH'] = os.path.join(self.tmp, 'bin') + ':' + self.env['PATH']
+        self.probe = PROBE % {'top_dir': top_dir, 'tmp': self.tmp}
+
+    def invocations(self):
+        try:
+            return len(open(os.path.join(self.tmp, 'invocations')).readlines())
+        except IOError:
+            return 0
+
+    def run_probes(self, count, ttl, jobids):
+        procs = []
+        for i in range(count):
+            procs.append(subprocess.Popen([sys.executable, '-c', self.probe, str(ttl)] + jobids,
+                                          stdout=subprocess.PIPE, env=self.env))
+        for proc in procs:
+            output = proc.stdout.read()
+            if proc.wait():
+                raise AssertionError("Probe failed")
+            for line in output.splitlines():
+                jobid, vo = line.split()
+                expected = int(jobid) < JOBS and 'cms' or 'None'
+                if vo != expected:
+                    raise AssertionError("Job %s has VO %s instead of %s" % (jobid, vo, expected))
+
+    def check(self, name, value, expected):
+        if value != expected:
+            raise AssertionError("%s is %s instead of %s" % (name, value, expected))
+
+    def run(self):
+        try:
+            self.run_probes(8, 60, ['1', '17', '1999', '5000'])
+            self.check("condor_ce_q invocations with 8 concurrent probes", self.invocations(), 1)
+            certinfo = sorted([os.path.basename(i) for i in glob.glob(os.path.join(self.tmp, 'data', '*'))])
+            self.check("certinfo files", certinfo,
+                       ['gratia_certinfo_pbs_1', 'gratia_certinfo_pbs_17', 'gratia_certinfo_pbs_1999'])
+            self.run_probes(2, 60, ['3'])
+            self.check("condor_ce_q invocations with a fresh snapshot", self.invocations(), 1)
+            time.sleep(3)
+            self.run_probes(4, 2, ['4'])
+            self.check("condor_ce_q invocations after the TTL", self.invocations(), 2)
+            print "OK"
+        finally:
+            shutil.rmtree(self.tmp)
+
+
+if __name__ == '__main__':
+    Test().run()
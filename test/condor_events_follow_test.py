@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Check that the condor-events follower (watchCondorEvents EventLogFollower)
+delivers each event of the XML event log exactly once while events are
+appended, the follower is killed and restarted, and the log is rotated.
+
+Run from a checkout, e.g.:
+    python test/condor_events_follow_test.py
+watchCondorEvents needs the Gratia common libraries.
+"""
+
+import os
+import sys
+import time
+import signal
+import shutil
+import tempfile
+import subprocess
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child process: follow the event log and write the delivered GlobalJobIds
+FOLLOWER = """
+import sys, imp, signal
+for pkg in ['common', 'common2']:
+    sys.path.insert(0, '%(top_dir)s/' + pkg)
+watch = imp.load_source('watchCondorEvents', '%(top_dir)s/condor-events/watchCondorEvents')
+out = open(sys.argv[3], 'a')
+def deliver(job_id, info):
+    out.write('%%s %%s\\n' %% (job_id, info.get('Extra', '-')))
+    out.flush()
+follower = watch.EventLogFollower(sys.argv[1], sys.argv[2], deliver)
+signal.signal(signal.SIGTERM, follower.stop)
+follower.run()
+""" % {'top_dir': top_dir}
+
+EVENT = """<c>
+    <a n="MyType"><s>%(type)s</s></a>
+    <a n="EventTypeNumber"><i>%(etype)d</i></a>
+    <a n="EventTime"><s>2015-03-01T12:00:00</s></a>
+    <a n="Cluster"><i>%(n)d</i></a>
+    <a n="Proc"><i>0</i></a>
+    <a n="GlobalJobId"><s>schedd.example.org#%(n)d.0#1425211200</s></a>
+</c>
+"""
+
+INFO = """<c>
+    <a n="MyType"><s>JobAdInformationEvent</s></a>
+    <a n="Extra"><s>info%(n)d</s></a>
+</c>
+"""
+
+
+class Test:
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp()
+        self.eventlog = os.path.join(self.tmp, 'EventLog')
+        self.checkpoint = os.path.join(self.tmp, 'CondorEventsCheckpoint')
+        self.output = os.path.join(self.tmp, 'delivered')
+        self.count = 0
+        self.child = None
+
+    def append(self, count, info_every=0):
+        fp = open(self.eventlog, 'a')
+        for i in range(count):
+            fp.write(EVENT % {'type': 'ExecuteEvent', 'etype': 1, 'n': self.count})
+            if info_every and self.count % info_every == 0:
+                fp.write(INFO % {'n': self.count})
+            self.count += 1
+            # events are written and flushed one at a time
+            fp.flush()
+        fp.close()
+
+    def start(self):
+        self.child = subprocess.Popen([sys.executable, '-c', FOLLOWER, self.eventlog, self.checkpoint,
+                                       self.output])
+
+    def kill(self, sig):
+        os.kill(self.child.pid, sig)
+        self.child.wait()
+
+    def delivered(self):
+        if not os.path.exists(self.output):
+            return []
+        return [line.split() for line in open(self.output).readlines()]
+
+    def wait_delivered(self, count, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if len(self.delivered()) >= count:
+                return
+            time.sleep(0.1)
+        raise AssertionError("Only %d events delivered, expected %d" % (len(self.delivered()), count))
+
+    def check(self, expected):
+        """All events but the last one (kept back waiting for a possible info event) delivered once"""
+        delivered = self.delivered()
+        ids = [int(job_id.split('#')[1].split('.')[0]) for job_id, extra in delivered]
+        if ids != range(expected):
+            raise AssertionError("Delivered events %s instead of 0-%d" % (ids, expected - 1))
+        for job_id, extra in delivered:
+            n = int(job_id.split('#')[1].split('.')[0])
+            if extra != '-' and extra != 'info%d' % n:
+                raise AssertionError("Info event %s merged in the wrong event %s" % (extra, job_id))
+
+    def run(self):
+        try:
+            self.append(100, info_every=7)
+            self.start()
+            self.wait_delivered(99)
+            # append while running, stop it before it is done
+            for i in range(20):
+                self.append(50, info_every=3)
+            self.kill(signal.SIGTERM)
+            self.start()
+            self.wait_delivered(self.count - 1)
+            self.check(self.count - 1)
+            # a hard kill once the checkpoint is written, then rotation
+            time.sleep(1)
+            self.kill(signal.SIGKILL)
+            self.append(10)
+            os.rename(self.eventlog, self.eventlog + '.old')
+            self.append(10, info_every=2)
+            self.start()
+            self.wait_delivered(self.count - 1)
+            # rotation while running
+            time.sleep(1)
+            os.rename(self.eventlog, self.eventlog + '.old')
+            self.append(5)
+            self.wait_delivered(self.count - 1)
+            self.kill(signal.SIGTERM)
+            self.check(self.count - 1)
+            print "OK: %d events delivered once" % (self.count - 1)
+        finally:
+            if self.child and self.child.poll() is None:
+                self.kill(signal.SIGKILL)
+            shutil.rmtree(self.tmp)
+
+
+if __name__ == '__main__':
+    Test().run()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Check that the dCache-storage InfoExtractor builds the same StorageElement and
+StorageElementRecord objects as the create_se_record.xsl transformation read
+back by XmlBuilder, on the sample info document dcache_storage_info.xml, with
+and without the pools.
+
+The transformation is run with xalan, like the probe used to, when it is
+installed. Otherwise its checked-in output is used (dcache_storage_records.xml
+and dcache_storage_records_nopools.xml, made with libxslt, which writes the
+summed quota space in exponent form: the space values are compared as numbers).
+
+Run from a checkout, e.g.:
+    python test/dcache_storage_extract_test.py
+"""
+
+import os
+import re
+import sys
+import time
+import subprocess
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pkg in ['dCache-storage', 'services', 'common']:
+    sys.path.insert(0, os.path.join(top_dir, pkg))
+
+import gratia.common.config as config
+import gratia.dcache_storage.XmlBuilder as XmlBuilder
+import gratia.dcache_storage.InfoExtractor as InfoExtractor
+
+SE = 'se.example.org'
+NOW = 1400000000
+INFO = os.path.join(top_dir, 'test', 'dcache_storage_info.xml')
+XSL = os.path.join(top_dir, 'dCache-storage', 'create_se_record.xsl')
+XALAN_CLASSPATH = '/usr/share/java/xalan-j2.jar:/usr/share/java/xalan-j2-serializer.jar'
+
+SPACE_FIELDS = ['TotalSpace', 'FreeSpace', 'UsedSpace']
+
+_field_re = re.compile(r'^<(\w+) [^>]*>(.*)</\1>$')
+
+
+class TestConfig:
+
+    def get_ProbeName(self):
+        return 'dCache-storage:' + SE
+
+    def get_SiteName(self):
+        return 'TEST_SITE'
+
+    def get_Grid(self):
+        return 'OSG'
+
+    def get_VOOverride(self):
+        return None
+
+    def get_DebugLevel(self):
+        return 0
+
+    def get_LogLevel(self):
+        return 0
+
+
+def xslt_records(pools):
+    """The records of the transformation, as read by XmlBuilder"""
+    if os.path.exists(XALAN_CLASSPATH.split(':')[0]):
+        cmd = ['java', '-cp', XALAN_CLASSPATH, 'org.apache.xalan.xslt.Process', '-PARAM', 'now', str(NOW),
+               '-PARAM', 'SE', SE, '-XSL', XSL, '-IN', INFO]
+        if not pools:
+            cmd[4:4] = ['-PARAM', 'nopools', '1']
+        fd = subprocess.Popen(cmd, stdout=subprocess.PIPE).stdout
+        source = 'xalan'
+    else:
+        name = pools and 'dcache_storage_records.xml' or 'dcache_storage_records_nopools.xml'
+        fd = open(os.path.join(top_dir, 'test', name))
+        source = name
+    return source, XmlBuilder.Xml2ObjectBuilder(fd).get().get()
+
+
+def fields(record):
+    result = []
+    for data in record.RecordData:
+        tag, value = _field_re.match(data).groups()
+        if tag in SPACE_FIELDS:
+            value = float(value)
+        result.append((tag, value))
+    return result
+
+
+def compare(pools):
+    source, expected = xslt_records(pools)
+    start = time.time()
+    got = InfoExtractor.InfoExtractor(SE, NOW, pools).extract(open(INFO))
+    elapsed = time.time() - start
+    if len(got) != len(expected):
+        raise AssertionError("%d records instead of %d" % (len(got), len(expected)))
+    for i in range(len(got)):
+        if got[i].__class__.__name__ != expected[i].__class__.__name__:
+            raise AssertionError("Record %d is a %s instead of a %s" % (i, got[i].__class__.__name__,
+                                                                       expected[i].__class__.__name__))
+        if fields(got[i]) != fields(expected[i]):
+            raise AssertionError("Record %d differs:\n%s\ninstead of\n%s" % (i, fields(got[i]), fields(expected[i])))
+    print "OK: %d records identical to %s (%.1f ms)" % (len(got), source, elapsed * 1000)
+
+
+if __name__ == '__main__':
+    config.Config = TestConfig()
+    compare(True)
+    compare(False)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Check that dcache-storagegroup sends only the storage groups whose space
+changed: run the probe on two snapshots against a local stub collector and
+count the StorageElementRecords it receives.
+
+Run from a checkout, e.g.:
+    python test/dcache_storagegroup_test.py
+The probe needs the Gratia common libraries.
+"""
+
+import os
+import sys
+import shutil
+import cPickle
+import urlparse
+import tempfile
+import threading
+import subprocess
+import BaseHTTPServer
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = os.path.join(top_dir, 'dCache-storagegroup', 'dcache-storagegroup')
+
+PROBE_CONFIG = """<ProbeConfiguration
+    CollectorHost="localhost:%(port)d"
+    SSLHost="localhost:%(port)d"
+    SSLRegistrationHost="localhost:%(port)d"
+    CollectorService="/gratia-servlets/rmi"
+    SSLCollectorService="/gratia-servlets/rmi"
+    RegistrationService="/gratia-registration/register"
+    ProbeName="dCache-storagegroup:test.example.org"
+    SiteName="Test dCache"
+    Grid="OSG"
+    EnableProbe="1"
+    BundleSize="0"
+    UseSSL="0"
+    LogLevel="0"
+    DebugLevel="0"
+    DataFolder="%(tmp)s/data/"
+    WorkingFolder="%(tmp)s/tmp"
+    LogFolder="%(tmp)s/log"
+    Lockfile="%(tmp)s/lock"
+    ChangeThreshold="1"
+    FullRefreshInterval="86400"
+/>
+"""
+
+POOL_GROUPS = 20
+STORAGE_GROUPS = 10
+POOLS = 3
+
+
+class Collector(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Stub collector: accept every post and count the StorageElementRecords"""
+
+    records = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.getheader('content-length')))
+        for xml in urlparse.parse_qs(body).get('arg1', []):
+            Collector.records += xml.count('<StorageElementRecord ')
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write('OK')
+
+    def log_message(self, *args):
+        pass
+
+
+def snapshot():
+    """{pool group: {pool: {storage group: bytes}}}"""
+    result = {}
+    for pg in range(POOL_GROUPS):
+        pools = {}
+        for pool in range(POOLS):
+            pools['pool_%d_%d' % (pg, pool)] = dict([('sg%d' % sg, 10 ** 12 + pg * 10 ** 9 + sg * 10 ** 6 + pool)
+                                                     for sg in range(STORAGE_GROUPS)])
+        result['pg%d' % pg] = pools
+    return result
+
+
+class Test:
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp()
+        for subdir in ['data', 'tmp', 'log']:
+            os.mkdir(os.path.join(self.tmp, subdir))
+        self.server = BaseHTTPServer.HTTPServer(('localhost', 0), Collector)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.config = os.path.join(self.tmp, 'ProbeConfig')
+        open(self.config, 'w').write(PROBE_CONFIG % {'port': self.server.server_port, 'tmp': self.tmp})
+        self.env = dict(os.environ)
+        self.env['PYTHONPATH'] = ':'.join([os.path.join(top_dir, 'common'), os.path.join(top_dir, 'services')] +
+                                          [i for i in [os.environ.get('PYTHONPATH')] if i])
+
+    def run_probe(self, snapshot_file, *args):
+        Collector.records = 0
+        if subprocess.call([sys.executable, PROBE, '-c', self.config, '-f', snapshot_file] + list(args),
+                           env=self.env, cwd=self.tmp):
+            raise AssertionError("The probe failed")
+        return Collector.records
+
+    def check(self, name, value, expected):
+        if value != expected:
+            raise AssertionError("%s: %s records sent instead of %s" % (name, value, expected))
+        print "%s: %d records sent" % (name, value)
+
+    def run(self):
+        try:
+            first = os.path.join(self.tmp, 'sg_space.data')
+            space = snapshot()
+            cPickle.dump(space, open(first, 'w'))
+            self.check("First snapshot", self.run_probe(first), POOL_GROUPS * (STORAGE_GROUPS + 1))
+            self.check("Same snapshot", self.run_probe(first), 0)
+
+            # One group grows by 50%, one by less than the threshold, one pool group is gone.
+            # This one is written as a sequence of (pool group, pools) items.
+            space['pg1']['pool_1_0']['sg3'] += space['pg1']['pool_1_0']['sg3'] / 2
+            space['pg2']['pool_2_1']['sg4'] += 1000
+            del space['pg3']
+            second = os.path.join(self.tmp, 'sg_space.items')
+            fp = open(second, 'w')
+            for item in space.iteritems():
+                cPickle.dump(item, fp)
+            fp.close()
+            # pg1 and its sg3
+            self.check("Second snapshot", self.run_probe(second), 2)
+            self.check("Full refresh", self.run_probe(second, '--full'), (POOL_GROUPS - 1) * (STORAGE_GROUPS + 1))
+            self.check("After the full refresh", self.run_probe(second), 0)
+            print "OK"
+        finally:
+            self.server.shutdown()
+            shutil.rmtree(self.tmp)
+
+
+if __name__ == '__main__':
+    Test().run()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Measure the parsing speed (lines per second) of the gridftp-transfer and
+glexec log parsers on synthetic logs.
+
+Run from a checkout, e.g.:
+    python test/log_parser_benchmark.py [-n LINES]
+The gridftp-transfer meter needs the Gratia common libraries and pytz.
+"""
+
+import os
+import sys
+import imp
+import time
+import tempfile
+import optparse
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pkg in ['common', 'common2', 'glexec']:
+    sys.path.insert(0, os.path.join(top_dir, pkg))
+
+
+def gridftp_lines(count):
+    """Lines like the ones of /var/log/gridftp-auth.log, 10 lines per transfer, ~5 per second"""
+    t0 = time.time() - count
+    messages = ["Server started in inetd mode.",
+                "Configuration read from /etc/gridftp.conf.",
+                "New connection from: [192.168.0.%(n)d]:%(port)d",
+                "DN /DC=org/DC=example/CN=user%(n)d successfully authorized.",
+                "VO cms /cms/Role=NULL/Capability=NULL,/cms/uscms/Role=NULL/Capability=NULL",
+                "User cmsuser%(n)d authorized with uid 10%(n)03d",
+                "Starting to transfer \"/store/file%(n)d\".",
+                "Finished transferring \"/store/file%(n)d\".",
+                "Transfer stats: DATE=20160802213503.123 HOST=gftp.example.org PROG=globus-gridftp-server "
+                "NL.EVNT=FTP_INFO START=20160802213501.1 USER=cmsuser%(n)d FILE=/store/file%(n)d BUFFER=87380 "
+                "BLOCK=262144 NBYTES=%(port)d VOLUME=/ STREAMS=1 STRIPES=1 DEST=[192.168.0.%(n)d] TYPE=RETR CODE=226",
+                "Closed connection from [192.168.0.%(n)d]:%(port)d"]
+    lines = []
+    for i in range(count):
+        n = i / len(messages)
+        msg = messages[i % len(messages)] % {'n': n % 250, 'port': 20000 + n}
+        stamp = time.strftime("%a %b %e %H:%M:%S %Y", time.localtime(t0 + i / 5))
+        lines.append("[%d] %s :: %s\n" % (10000 + n, stamp, msg))
+    return lines
+
+
+def glexec_lines(count, version):
+    """glexec monitor lines in format v1 ([utime#mon gl]), v2 (glemon[]) or v3 (syslog)"""
+    t0 = time.time() - count
+    messages = ['Started, target uid 50%(n)03d',
+                'Used DN "/DC=org/DC=example/CN=user%(n)d"',
+                'Used VO "cms"',
+                'Used FQAN "/cms/Role=pilot/Capability=NULL"',
+                'Terminated, user 12 system 3']
+    lines = []
+    for i in range(count):
+        n = i / len(messages)
+        msg = messages[i % len(messages)] % {'n': n % 1000}
+        utime = int(t0 + i / 5)
+        if version == 1:
+            lines.append("[%d#%d %d] %s\n" % (utime, 100 + n, 200 + n, msg))
+        elif version == 2:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(utime))
+            lines.append("glemon[%d#%d]: %s %s\n" % (100 + n, 200 + n, stamp, msg))
+        else:
+            if i % 4 == 3:
+                # other programs write to syslog too
+                lines.append("%s host sshd[%d]: Accepted publickey for root\n" %
+                             (time.strftime("%b %e %H:%M:%S", time.localtime(utime)), n))
+                continue
+            lines.append("%s host glexec.mon[%d#%d]: %s\n" %
+                         (time.strftime("%b %e %H:%M:%S", time.localtime(utime)), 100 + n, 200 + n, msg))
+    return lines
+
+
+def report(name, count, elapsed):
+    print "%-28s %9d lines %8.2f s %10.0f lines/s" % (name, count, elapsed, count / max(elapsed, 1e-9))
+
+
+def bench_gridftp(count):
+    meter = imp.load_source('gridftp_transfer_meter', os.path.join(top_dir, 'gridftp-transfer', 'gridftp-transfer_meter'))
+    lines = gridftp_lines(count)
+    start = time.time()
+    for line in lines:
+        info = meter.process_line_prefix(line)
+        if info:
+            meter._classifier.classify(info[2])
+    report("gridftp (classify)", count, time.time() - start)
+
+
+def bench_glexec(count):
+    import gratia.glexec.gratia_glexec_parser as parser
+    for version in [1, 2, 3]:
+        lines = glexec_lines(count, version)
+        start = time.time()
+        for line in lines:
+            try:
+                parser.parse_line(line)
+            except Exception:
+                pass
+        report("glexec v%d (parse_line)" % version, count, time.time() - start)
+
+        fd, fname = tempfile.mkstemp(prefix='glexec_bench')
+        try:
+            os.write(fd, ''.join(lines))
+            os.close(fd)
+            start = time.time()
+            parser.parse_log(fname, 0)
+            report("glexec v%d (parse_log)" % version, count, time.time() - start)
+        finally:
+            os.unlink(fname)
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--lines", help="Number of log lines per test (default 200000).",
+                      dest="lines", default=200000, type="int")
+    opts, args = parser.parse_args()
+    bench_glexec(opts.lines)
+    try:
+        bench_gridftp(opts.lines)
+    except ImportError, e:
+        print "gridftp benchmark skipped: %s" % e
+
+
+if __name__ == '__main__':
+    main()
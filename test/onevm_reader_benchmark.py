@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Measure the throughput and the peak memory of the onevm OneReader on a
+generated query_one dump: the old eval() of the whole file, the streaming
+parser of the old format (iterLegacyRecords) and the record per line format
+written by query_one_lite.rb. Exits with an error if the records differ.
+
+Run from a checkout, e.g.:
+    python test/onevm_reader_benchmark.py [-n VMS] [--skip-eval]
+Each reader runs in its own process, so that its peak RSS can be measured.
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import random
+import resource
+import tempfile
+import optparse
+import subprocess
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(top_dir, 'onevm', 'gratia', 'onevm'))
+
+import OneReader
+
+
+def vm_info(vm_id, now):
+    """A VM like the ones in a query_one dump (see VMRecord)"""
+    stime = now - random.randint(3600, 20 * 3600)
+    etime = random.choice([0, stime + random.randint(60, 3600)])
+    return {"VCPU": "1", "MEMORY": str(random.randint(1, 8) * 1048576), "NAME": "vm-%d" % vm_id,
+            "STIME": str(stime), "ETIME": str(etime), "USERNAME": "user%d" % (vm_id % 300),
+            "GID": "102", "GNAME": "fermicloud", "UID": str(vm_id % 300), "ID": str(vm_id),
+            "STATE": etime and "6" or "3", "STATE_STR": etime and "DONE" or "ACTIVE",
+            "LCM_STATE": "3", "LCM_STATE_STR": "RUNNING", "CPU": "0",
+            "HID": ["6"], "HOSTNAME": ["fcl%03d" % (vm_id % 400)], "HISTORY_STIME": [str(stime + 10)],
+            "HISTORY_ETIME": [str(etime)], "HISTORY_REASON": ["0"],
+            "IP": "192.168.%d.%d" % (vm_id / 256 % 256, vm_id % 256), "MAC": "02:00:c0:a8:9a:99",
+            "DISK_ID": ["0", "1"], "DISK_TYPE": [None, "swap"], "DISK_SIZE": [None, "5120"],
+            "DN": ["/DC=org/DC=example/OU=People/CN=User\\20%d" % (vm_id % 300)]}
+
+
+def generate(count, legacy_file, lines_file):
+    """Write the same VMs in the old dictionary format and in the record per line format"""
+    now = int(time.time())
+    legacy = open(legacy_file, 'w')
+    lines = open(lines_file, 'w')
+    lines.write(OneReader.RECORDS_HEADER + " 1\n")
+    legacy.write("{")
+    for vm_id in range(1, count + 1):
+        info = vm_info(vm_id, now)
+        if vm_id > 1:
+            legacy.write(", ")
+        legacy.write("%d: %s" % (vm_id, json.dumps(info).replace("null", "None")))
+        lines.write(json.dumps([vm_id, info]) + "\n")
+    legacy.write("}\n")
+    legacy.close()
+    lines.close()
+
+
+def read(mode, filename):
+    """Child process: read the file, return (seconds, records, digest)"""
+    start = time.time()
+    digest = 0
+    count = 0
+    if mode == 'eval':
+        # The reader before the streaming formats
+        tmp = eval(open(filename).read())
+        items = sorted(tmp.items())
+    else:
+        items = OneReader.OneReader(filename).iterRecords()
+    for key, value in items:
+        if mode == 'eval':
+            value = OneReader.VMRecord(key, value)
+        digest ^= hash(repr((key, sorted(value.info.items()))))
+        count += 1
+    return time.time() - start, count, digest
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--vms", help="Number of VMs in the dump (default 1000000).",
+                      dest="vms", default=1000000, type="int")
+    parser.add_option("--skip-eval", help="Do not run the eval() reader (it needs several times the file size "
+                      "in memory).", dest="skip_eval", default=False, action="store_true")
+    parser.add_option("--child", help=optparse.SUPPRESS_HELP, dest="child", default=None)
+    opts, args = parser.parse_args()
+
+    if opts.child:
+        seconds, count, digest = read(opts.child, args[0])
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print seconds, count, digest, peak
+        return
+
+    random.seed(1)
+    tmp = tempfile.mkdtemp()
+    try:
+        legacy_file = os.path.join(tmp, 'query_one.legacy')
+        lines_file = os.path.join(tmp, 'query_one.log')
+        generate(opts.vms, legacy_file, lines_file)
+        print "%d VMs: old format %.1f MB, record per line %.1f MB" % \
+            (opts.vms, os.path.getsize(legacy_file) / 1e6, os.path.getsize(lines_file) / 1e6)
+        runs = [('lines', lines_file), ('legacy', legacy_file)]
+        if not opts.skip_eval:
+            runs.append(('eval', legacy_file))
+        results = []
+        for mode, filename in runs:
+            output = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', mode, filename],
+                                      stdout=subprocess.PIPE).communicate()[0]
+            seconds, count, digest, peak = output.split()
+            seconds = float(seconds)
+            print "%-8s %8.1f s %10.0f VMs/s  peak RSS %8.1f MB" % \
+                (mode, seconds, int(count) / max(seconds, 1e-9), int(peak) / 1024.0)
+            results.append((int(count), digest))
+        for result in results[1:]:
+            if result != results[0]:
+                print "ERROR: the readers returned different records"
+                sys.exit(1)
+        print "Records identical"
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Check gratia.common.retention: the directory is listed again only when it
+changed, the files are removed by age and by size, at most max_removals per
+run, and the heap entries of files modified or removed behind the index'
+back are skipped.
+
+Run from a checkout, e.g.:
+    python test/retention_test.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(top_dir, 'common'))
+
+import gratia.common.config as config
+import gratia.common.retention as retention
+
+DAY = 24 * 3600
+
+
+class TestConfig:
+
+    def __init__(self, working_folder):
+        self.working_folder = working_folder
+
+    def get_WorkingFolder(self):
+        return self.working_folder
+
+    def get_LogFolder(self):
+        return self.working_folder
+
+    def get_LogFileName(self):
+        return None
+
+    def get_DebugLevel(self):
+        return 0
+
+    def get_LogLevel(self):
+        return 0
+
+
+class Test:
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp()
+        self.dir = os.path.join(self.tmp, 'data')
+        os.mkdir(self.dir)
+        config.Config = TestConfig(os.path.join(self.tmp, 'working'))
+        self.listings = 0
+        self.listdir = os.listdir
+
+    def counting_listdir(self, path):
+        if path == self.dir:
+            self.listings += 1
+        return self.listdir(path)
+
+    def create(self, name, age_days, size=1000):
+        """Create a file of size bytes, last modified age_days ago"""
+        path = os.path.join(self.dir, name)
+        open(path, 'w').write('x' * size)
+        mtime = time.time() - age_days * DAY
+        os.utime(path, (mtime, mtime))
+
+    def index(self):
+        """A new index, as loaded by the next run of a probe"""
+        retention.__indexes__.clear()
+        return retention.GetRetentionIndex(self.dir, 'gratia_*')
+
+    def names(self):
+        return sorted([i for i in self.listdir(self.dir) if i.startswith('gratia_')])
+
+    def check(self, name, value, expected):
+        if value != expected:
+            raise AssertionError('%s: %r instead of %r' % (name, value, expected))
+        print 'OK: %s' % name
+
+    def test_refresh(self):
+        for i in range(10):
+            self.create('gratia_%d' % i, 10 - i)
+        self.create('other', 50)
+        self.listings = 0
+        for i in range(3):
+            self.index().enforce(31)
+        self.check('directory listed once in 3 runs', self.listings, 1)
+        self.check('index outside of the directory', sorted(self.listdir(self.dir)), self.names() + ['other'])
+        index = self.index()
+        self.check('index reloaded', (len(index.files), index.total), (10, 10000))
+        self.create('gratia_new', 0)
+        index.enforce(31)
+        self.check('directory listed again after a change', (self.listings, len(index.files)), (2, 11))
+
+    def test_age(self):
+        index = self.index()
+        self.check('files older than 8 days removed', index.enforce(8), 3)
+        self.check('files left', self.names(), ['gratia_3', 'gratia_4', 'gratia_5', 'gratia_6', 'gratia_7',
+                                                'gratia_8', 'gratia_9', 'gratia_new'])
+        self.check('index after removal', (len(index.files), index.total), (8, 8000))
+
+    def test_max_removals(self):
+        index = self.index()
+        self.check('at most 2 files removed', index.enforce(5, 0, 2), 2)
+        self.check('the oldest first', self.names()[0], 'gratia_5')
+        self.check('the others at the next run', self.index().enforce(5, 0, 2), 1)
+        self.check('files left', self.names(), ['gratia_6', 'gratia_7', 'gratia_8', 'gratia_9', 'gratia_new'])
+
+    def test_size(self):
+        index = self.index()
+        # Above the limit the directory is reduced to 80% of it
+        self.check('oldest files removed over the size limit', index.enforce(31, 4500), 2)
+        self.check('files left', self.names(), ['gratia_8', 'gratia_9', 'gratia_new'])
+        self.check('total size', index.total, 3000)
+
+    def test_stale(self):
+        # gratia_8 is rewritten and gratia_9 removed behind the index' back
+        index = self.index()
+        self.create('gratia_8', 0, 500)
+        os.remove(os.path.join(self.dir, 'gratia_9'))
+        self.create('gratia_old', 3)
+        index.refresh()
+        self.check('stale heap entry of the removed file', len(index.heap) - len(index.files), 1)
+        self.check('only the new old file removed', index.enforce(1.5), 1)
+        self.check('files left', self.names(), ['gratia_8', 'gratia_new'])
+        self.check('index updated', (sorted(index.files.keys()), index.total), (['gratia_8', 'gratia_new'], 1500))
+        self.check('nothing left to remove', self.index().enforce(1.5), 0)
+
+    def run(self):
+        os.listdir = self.counting_listdir
+        try:
+            self.test_refresh()
+            self.test_age()
+            self.test_max_removals()
+            self.test_size()
+            self.test_stale()
+        finally:
+            os.listdir = self.listdir
+            shutil.rmtree(self.tmp)
+
+
+if __name__ == '__main__':
+    Test().run()
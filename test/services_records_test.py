@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Check the xml of the gratia.services records (StorageElement,
+StorageElementRecord, ComputeElement, ComputeElementRecord and Subcluster)
+against services_records.golden.xml, the output of the classes before the
+table-driven ServiceRecord base, and check that a batch serializes to the same
+records. The record identities (host, pid, counter and creation time) are
+blanked out.
+
+Run from a checkout, e.g.:
+    python test/services_records_test.py [--write]
+"""
+
+import os
+import re
+import sys
+import time
+import optparse
+import xml.dom.minidom
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pkg in ['services', 'common']:
+    sys.path.insert(0, os.path.join(top_dir, pkg))
+
+import gratia.common.config as config
+
+from gratia.services.StorageElement import StorageElement
+from gratia.services.StorageElementRecord import StorageElementRecord
+from gratia.services.ComputeElement import ComputeElement
+from gratia.services.ComputeElementRecord import ComputeElementRecord
+from gratia.services.Subcluster import Subcluster
+
+GOLDEN = os.path.join(top_dir, 'test', 'services_records.golden.xml')
+
+_identity_re = re.compile(r'urwg:recordId="[^"]*" urwg:createTime="[^"]*"')
+
+
+class TestConfig:
+
+    def get_ProbeName(self):
+        return 'test:probe.example.org'
+
+    def get_SiteName(self):
+        return 'Test & "Site"'
+
+    def get_Grid(self):
+        return 'OSG'
+
+    def get_VOOverride(self):
+        return None
+
+    def get_DebugLevel(self):
+        return 0
+
+    def get_LogLevel(self):
+        return 0
+
+
+def make_records():
+    """Records using every field, with values to escape, replaced values and repeated timestamps"""
+    result = []
+
+    se = StorageElement()
+    se.UniqueID('se.example.org:SE:se.example.org')
+    se.ParentID('se.example.org:SE:se.example.org')
+    se.Name('se.example.org')
+    se.SE('se.example.org')
+    se.SpaceType('SE')
+    se.VO('cms')
+    se.OwnerDN('/DC=org/DC=example/CN=Storage <Admin> & co')
+    se.Implementation('dCache')
+    se.Version('2.6.19')
+    se.Timestamp(1400000000)
+    se.Status('Production')
+    result.append(se)
+
+    se = StorageElement()
+    se.Status(1)
+    se.UniqueID('se.example.org:Pool:pool_1')
+    se.Timestamp('2014-05-13T16:53:20Z')
+    se.Name("pool_'1'")
+    se.Timestamp(1400000060.5)
+    se.Status('Closed')
+    result.append(se)
+
+    ser = StorageElementRecord()
+    ser.UniqueID('se.example.org:SE:se.example.org')
+    ser.MeasurementType('raw')
+    ser.StorageType('disk')
+    ser.TotalSpace(5497558138880L)
+    ser.FreeSpace(1649267441664)
+    ser.UsedSpace(3848290697216.0)
+    ser.FileCountLimit(1000000)
+    ser.FileCount('12345')
+    ser.Timestamp(1400000000)
+    ser.TotalSpace(5497558138881)
+    result.append(ser)
+
+    ce = ComputeElement()
+    ce.UniqueID('ce.example.org:2119/jobmanager-condor-default')
+    ce.CEName('default')
+    ce.Cluster('ce.example.org')
+    ce.HostName('ce.example.org')
+    ce.Timestamp(1400000000)
+    ce.LrmsType('condor')
+    ce.LrmsVersion('8.0.6')
+    ce.MaxRunningJobs(1000)
+    ce.MaxTotalJobs(2000)
+    ce.AssignedJobSlots(500)
+    ce.Status('Production')
+    result.append(ce)
+
+    cer = ComputeElementRecord()
+    cer.UniqueID('ce.example.org:2119/jobmanager-condor-default')
+    cer.VO('cms')
+    cer.Timestamp(1400000000)
+    cer.RunningJobs(120)
+    cer.TotalJobs(150)
+    cer.WaitingJobs(30)
+    result.append(cer)
+
+    sc = Subcluster()
+    sc.UniqueID('ce.example.org-subcluster')
+    sc.Name('subcluster')
+    sc.Cluster('ce.example.org')
+    sc.Platform('x86_64')
+    sc.OS('ScientificSL')
+    sc.OSVersion('6.5')
+    sc.Timestamp(1400000000)
+    sc.Cores(8)
+    sc.Hosts(100)
+    sc.Cpus(2)
+    sc.RAM(32768)
+    sc.Processor('Intel(R) Xeon(R) CPU E5-2650 0 @ 2.00GHz')
+    sc.BenchmarkName('SI2K')
+    sc.BenchmarkValue(2500)
+    result.append(sc)
+    return result
+
+
+def record_xml(record):
+    record.XmlCreate()
+    return _identity_re.sub('urwg:recordId="" urwg:createTime=""', ''.join(record.XmlData))
+
+
+def elements(xml_string):
+    """The (tag, attributes, text) of the records of a document, the record identities blanked out"""
+    doc = xml.dom.minidom.parseString(_identity_re.sub('urwg:recordId="" urwg:createTime=""', xml_string))
+    root = doc.documentElement
+    if root.tagName != 'RecordEnvelope':
+        records = [root]
+    else:
+        records = [i for i in root.childNodes if i.nodeType == i.ELEMENT_NODE]
+    result = []
+    for record in records:
+        children = [(i.tagName, sorted(i.attributes.items()), ''.join([t.data for t in i.childNodes]))
+                    for i in record.childNodes if i.nodeType == i.ELEMENT_NODE]
+        result.append((record.tagName, children))
+    doc.unlink()
+    return result
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--write", help="Write the golden file from the current classes.",
+                      dest="write", default=False, action="store_true")
+    opts, args = parser.parse_args()
+
+    config.Config = TestConfig()
+    output = ''.join([record_xml(i) for i in make_records()])
+    if opts.write:
+        open(GOLDEN, 'w').write(output)
+        print "Wrote %s" % GOLDEN
+        return
+    golden = open(GOLDEN).read()
+    if output != golden:
+        print "ERROR: the xml differs from %s:" % GOLDEN
+        print output
+        sys.exit(1)
+    print "OK: xml identical to %s" % os.path.basename(GOLDEN)
+
+    import gratia.services.ServiceRecord as ServiceRecord
+    records = make_records()
+    batch = ServiceRecord.SerializeBatch(records)
+    expected = []
+    for record in make_records():
+        expected.extend(elements(record_xml(record)))
+    if elements(batch) != expected:
+        print "ERROR: the batch differs from the single records"
+        sys.exit(1)
+    print "OK: batch of %d records identical" % len(records)
+
+    count = 20000
+    start = time.time()
+    for i in range(count):
+        se = StorageElement()
+        se.UniqueID('se.example.org:Pool:pool_%d' % i)
+        se.Name('pool_%d' % i)
+        se.SE('se.example.org')
+        se.SpaceType('Pool')
+        se.Implementation('dCache')
+        se.Version('2.6.19')
+        se.Timestamp(1400000000)
+        se.Status('Production')
+        se.XmlCreate()
+    elapsed = time.time() - start
+    print "%d StorageElement records created in %.2f s (%.0f records/s)" % (count, elapsed, count / elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Compare the speed of gratia.common2.timeutil parse_datetime and format_datetime
+with the strptime/strftime implementations they replaced (_parse_datetime_strptime
+and _format_datetime), on a mix of timestamps with repetitions like the ones
+in accounting records and logs. Exits with an error if any output differs.
+
+Run from a checkout, e.g.:
+    python test/timeutil_benchmark.py [-n COUNT]
+"""
+
+import os
+import sys
+import time
+import random
+import optparse
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pkg in ['common', 'common2']:
+    sys.path.insert(0, os.path.join(top_dir, pkg))
+
+import gratia.common2.timeutil as timeutil
+
+FORMATS = ["%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y%m%dT%H:%M:%SZ",
+           "%Y%m%d", "%Y-%m-%d",
+           # not fixed width, parsed with strptime
+           " %Y-%m-%d %H:%M:%S ", "%Y-%m-%dT%H:%M:%S Z"]
+
+
+def timestamps(count, distinct):
+    """count seconds from the Epoch, picked from distinct consecutive values (in order, like log files)"""
+    t0 = int(time.time()) - 30 * 86400
+    values = []
+    for i in range(count):
+        values.append(t0 + (i * distinct) / count + random.randint(0, 3))
+    return values
+
+
+def date_strings(values):
+    result = []
+    for value in values:
+        fmt = FORMATS[random.randint(0, 5)]
+        if random.randint(0, 20) == 0:
+            fmt = FORMATS[random.randint(6, 7)]
+        result.append(time.strftime(fmt, time.gmtime(value)))
+    return result
+
+
+def bench(name, count, function, args, reference):
+    start = time.time()
+    for i in args:
+        reference(*i)
+    ref_time = time.time() - start
+    start = time.time()
+    for i in args:
+        function(*i)
+    new_time = time.time() - start
+    print "%-36s %8.2f s (was %8.2f s) speedup %5.1fx" % (name, new_time, ref_time, ref_time / max(new_time, 1e-9))
+    for i in args:
+        expected = reference(*i)
+        got = function(*i)
+        if got != expected or repr(got) != repr(expected):
+            print "ERROR: output differs for %s: %r instead of %r" % (i, got, expected)
+            return False
+    return True
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--count", help="Number of timestamps (default 1000000).",
+                      dest="count", default=1000000, type="int")
+    parser.add_option("-d", "--distinct", help="Approximate number of distinct timestamps (default 20000).",
+                      dest="distinct", default=20000, type="int")
+    opts, args = parser.parse_args()
+    random.seed(1)
+    values = timestamps(opts.count, opts.distinct)
+    strings = date_strings(values)
+    ok = True
+    ok = bench("parse_datetime", opts.count, timeutil.parse_datetime,
+               [(i,) for i in strings], timeutil._parse_datetime_strptime) and ok
+    ok = bench("parse_datetime(return_seconds)", opts.count, timeutil.parse_datetime,
+               [(i, True) for i in strings], timeutil._parse_datetime_strptime) and ok
+    ok = bench("format_datetime", opts.count, timeutil.format_datetime,
+               [(i,) for i in values], timeutil._format_datetime) and ok
+    ok = bench("format_datetime(iso8601=False)", opts.count, timeutil.format_datetime,
+               [(i, False) for i in values], timeutil._format_datetime) and ok
+    if not ok:
+        sys.exit(1)
+    print "Output identical"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Compare the cold start and the lookup speed of gratia.common.vo with the
+compiled user-vo-map (CompiledVOMap) and with the parsed dictionaries of the
+user-vo-map file (parseMapfile), on a synthetic map.
+Exits with an error if any lookup result differs.
+
+Run from a checkout, e.g.:
+    python test/vo_map_benchmark.py [-n USERS] [-l LOOKUPS]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import optparse
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(top_dir, 'common'))
+
+import gratia.common.config as config
+import gratia.common.vo as vo
+
+
+class BenchmarkConfig:
+
+    def __init__(self, mapfile, working_folder):
+        self.mapfile = mapfile
+        self.working_folder = working_folder
+
+    def get_UserVOMapFile(self):
+        return self.mapfile
+
+    def get_WorkingFolder(self):
+        return self.working_folder
+
+    def get_DebugLevel(self):
+        return 0
+
+    def get_LogLevel(self):
+        return 0
+
+
+def write_map(filename, count):
+    vos = ['vo%d' % i for i in range(200)]
+    fp = open(filename, 'w')
+    fp.write("# User-VO map\n# Generated by vo_map_benchmark\n\n")
+    fp.write("#voi %s\n" % ' '.join(vos))
+    fp.write("#VOc %s\n" % ' '.join([i.upper() for i in vos]))
+    for i in range(count):
+        fp.write("user%07d %s\n" % (i, vos[i % len(vos)]))
+    fp.close()
+    return vos
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--users", help="Number of users in the map (default 100000).",
+                      dest="users", default=100000, type="int")
+    parser.add_option("-l", "--lookups", help="Number of lookups (default 1000000).",
+                      dest="lookups", default=1000000, type="int")
+    opts, args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        mapfile = os.path.join(tmp, 'user-vo-map')
+        vos = write_map(mapfile, opts.users)
+        config.Config = BenchmarkConfig(mapfile, tmp)
+        st = os.stat(mapfile)
+
+        parse_time, (users, voc) = timed(vo.parseMapfile, mapfile)
+        compile_time, compiled = timed(vo.__dict__['__loadMap'], mapfile, st)
+        load_time, compiled = timed(vo.__dict__['__loadMap'], mapfile, st)
+        reference = vo.DictVOMap(users, voc)
+        print "%d users" % opts.users
+        print "cold start, parse the map file:     %8.3f s" % parse_time
+        print "cold start, parse and compile:      %8.3f s" % compile_time
+        print "cold start, open the compiled map:  %8.3f s (speedup %.0fx)" % \
+            (load_time, parse_time / max(load_time, 1e-9))
+
+        random.seed(1)
+        names = ["user%07d" % random.randint(0, opts.users + opts.users / 10) for i in range(opts.lookups)]
+        names += vos + ['unknown']
+        dict_time, expected = timed(lambda: [reference.user(i) for i in names])
+        mmap_time, got = timed(lambda: [compiled.user(i) for i in names])
+        print "%d lookups, dictionaries:      %8.3f s" % (len(names), dict_time)
+        print "%d lookups, compiled map:      %8.3f s" % (len(names), mmap_time)
+        if got != expected:
+            print "ERROR: VOfromUser results differ"
+            sys.exit(1)
+        vois = [random.choice(vos) for i in range(opts.lookups)] + vos + ['unknown']
+        dict_time, expected = timed(lambda: [reference.voc(i) for i in vois])
+        mmap_time, got = timed(lambda: [compiled.voc(i) for i in vois])
+        print "%d VOc lookups, dictionaries:  %8.3f s" % (len(vois), dict_time)
+        print "%d VOc lookups, compiled map:  %8.3f s" % (len(vois), mmap_time)
+        if got != expected:
+            print "ERROR: VOc results differ"
+            sys.exit(1)
+        for name in names[:1000]:
+            if vo.VOfromUser(name) != reference.user(name):
+                print "ERROR: VOfromUser(%s) differs" % name
+                sys.exit(1)
+        print "Output identical"
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
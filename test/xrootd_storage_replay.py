@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+Replay captured xrootd summary packets through the xrootd-storage probe
+pipeline (gratia-xrootd-storage PacketPipeline, XrdDataHandler and
+GratiaHandler) and report its packet counters and rate, and the records the
+summary sends. The host totals are checked against a parse of the whole
+packets.
+
+Packets are captured by the probe with --capture FILE; --generate HOSTS
+writes a synthetic capture instead.
+
+Run from a checkout, e.g.:
+    python test/xrootd_storage_replay.py --generate 500 -f /tmp/xrd.packets
+    python test/xrootd_storage_replay.py -f /tmp/xrd.packets [-r RATE] [-q QUEUE]
+The probe needs the Gratia common libraries.
+"""
+
+import os
+import imp
+import sys
+import time
+import random
+import optparse
+import cStringIO
+
+from xml.sax import make_parser
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pkg in ['services', 'common']:
+    sys.path.insert(0, os.path.join(top_dir, pkg))
+
+import gratia.common.config as config
+
+xrd = imp.load_source('gratia_xrootd_storage', os.path.join(top_dir, 'xrootd-storage', 'gratia-xrootd-storage'))
+
+PACKET = '<statistics tod="%(tod)d" ver="v3.3.6" src="%(host)s:1094" tos="1400000000" pgm="xrootd" ins="anon" ' \
+    'pid="%(pid)d"><stats id="info"><host>%(host)s</host><port>1094</port><name>anon</name></stats>' \
+    '<stats id="link"><num>12</num><maxn>40</maxn><tot>%(tod)d</tot><in>123456</in><out>654321</out>' \
+    '<ctime>7</ctime><tmo>0</tmo><stall>0</stall><sfps>0</sfps></stats>' \
+    '<stats id="oss" v="2"><paths>%(npaths)d%(paths)s</paths><space>%(nspaces)d%(spaces)s</space></stats>' \
+    '</statistics toe="%(tod)d">'
+PATH = '<stats id="%(id)d"><lp>"/data%(id)d"</lp><rp>"/data%(id)d"</rp><tot>%(tot)d</tot><free>%(free)d</free>' \
+    '<ino>1000</ino><ifr>500</ifr></stats>'
+SPACE = '<stats id="%(id)d"><name>%(name)s</name><tot>%(tot)d</tot><free>%(free)d</free><maxf>%(free)d</maxf>' \
+    '<fsn>1</fsn><usg>%(usg)d</usg><qta>%(qta)d</qta></stats>'
+# Statistics without oss, like a sched or buff report
+OTHER = '<statistics tod="%(tod)d" ver="v3.3.6" src="%(host)s:1094" tos="1400000000" pgm="xrootd" ins="anon" ' \
+    'pid="%(pid)d"><stats id="sched"><jobs>%(tod)d</jobs><inq>0</inq><maxinq>3</maxinq><threads>20</threads>' \
+    '<idle>18</idle><tcr>20</tcr><tde>0</tde><tlimr>0</tlimr></stats><stats id="buff"><reqs>10</reqs>' \
+    '<mem>1048576</mem><buffs>4</buffs><adj>0</adj></stats></statistics>'
+
+
+class ReplayConfig:
+
+    def getConfigAttribute(self, name):
+        return {'SiteName': 'TEST_SE', 'XrootdVersion': '3.3.6'}.get(name)
+
+    def get_ProbeName(self):
+        return 'xrootd-storage:test.example.org'
+
+    def get_SiteName(self):
+        return 'TEST_SE'
+
+    def get_Grid(self):
+        return 'OSG'
+
+    def get_VOOverride(self):
+        return None
+
+    def get_DebugLevel(self):
+        return 0
+
+    def get_LogLevel(self):
+        return 0
+
+
+class CountingHandler(xrd.GratiaHandler):
+    """Count the records of the summary instead of sending them"""
+
+    def __init__(self):
+        xrd.GratiaHandler.__init__(self)
+        self.records = 0
+
+    def send(self, record):
+        self.records += 1
+
+
+def generate(filename, hosts, rounds):
+    """Each host reports its oss statistics every round, with a few other reports in between"""
+    fp = open(filename, 'w')
+    for i in range(rounds):
+        for host in range(hosts):
+            info = {'tod': 1400000000 + i * 60, 'host': 'xrd%04d.example.org' % host, 'pid': 1000 + host}
+            paths = [PATH % {'id': p, 'tot': 2 ** 30, 'free': 2 ** 29 - (host + p) * 4096 - (host % 7 == 0 and i)}
+                     for p in range(4)]
+            spaces = [SPACE % {'id': a, 'name': name, 'tot': 2 ** 31, 'free': 2 ** 30 - host, 'usg': 2 ** 30 + host,
+                               'qta': a * 2 ** 30} for a, name in enumerate(['public', 'cms', 'atlas'])]
+            info.update({'npaths': len(paths), 'paths': ''.join(paths), 'nspaces': len(spaces),
+                         'spaces': ''.join(spaces)})
+            xrd.write_packet(fp, PACKET % info)
+            if random.random() < 0.5:
+                xrd.write_packet(fp, OTHER % info)
+    fp.close()
+
+
+def reference_totals(packets):
+    """The host totals from a parse of the whole packets, like the probe before the pre-filter"""
+    handler = CountingHandler()
+    parser = make_parser()
+    parser.setContentHandler(xrd.XrootdSummaryParser(handler.handle))
+    parser.setFeature(xrd.feature_external_ges, False)
+    for data in packets:
+        parser.parse(cStringIO.StringIO(xrd.invalid_xml_re.sub("</statistics>", data)))
+    return totals(handler)
+
+
+def totals(handler):
+    return sorted([(host, info.get_total_kb(), info.get_total_free_kb(), sorted(info.area_info.items()))
+                   for host, info in handler.host_info.items()])
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("-f", "--file", help="Packet capture file.", dest="file")
+    parser.add_option("--generate", help="Write a synthetic capture with this many hosts to the file and exit.",
+                      dest="generate", type="int")
+    parser.add_option("--rounds", help="Reports per host in the synthetic capture (default 20).",
+                      dest="rounds", default=20, type="int")
+    parser.add_option("-r", "--rate", help="Packets per second (default 0, as fast as possible).",
+                      dest="rate", default=0, type="float")
+    parser.add_option("-q", "--queue", help="Queue size (default %d)." % xrd.QUEUE_SIZE,
+                      dest="queue", default=xrd.QUEUE_SIZE, type="int")
+    opts, args = parser.parse_args()
+    if not opts.file:
+        parser.error("No packet capture file")
+
+    if opts.generate:
+        random.seed(1)
+        generate(opts.file, opts.generate, opts.rounds)
+        print "Wrote %d bytes of packets to %s" % (os.path.getsize(opts.file), opts.file)
+        return
+
+    config.Config = ReplayConfig()
+    packets = list(xrd.read_packets(open(opts.file)))
+    handler = CountingHandler()
+    pipeline = xrd.PacketPipeline(xrd.XrdDataHandler(handler.handle), queue_size=opts.queue, lock=handler.lock)
+    pipeline.start()
+
+    start = time.time()
+    for i, data in enumerate(packets):
+        if opts.rate:
+            delay = start + i / opts.rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        pipeline.put(data)
+    sent = time.time() - start
+    pipeline.join()
+    elapsed = time.time() - start
+    print "%d packets replayed in %.2f s (%.0f packets/s), processed in %.2f s (%.0f packets/s)" % \
+        (len(packets), sent, len(packets) / max(sent, 1e-9), elapsed, len(packets) / max(elapsed, 1e-9))
+    print "Packets %s" % pipeline
+    if pipeline.received != pipeline.dropped + pipeline.parsed + pipeline.skipped + pipeline.errors:
+        print "ERROR: packets unaccounted for"
+        sys.exit(1)
+
+    handler.summary()
+    first = handler.records
+    handler.summary()
+    print "Summary: %d records sent, %d records on the next pass without new packets" % \
+        (first, handler.records - first)
+    if handler.records != first:
+        print "ERROR: unchanged hosts sent again"
+        sys.exit(1)
+
+    if not pipeline.dropped and not pipeline.errors:
+        if totals(handler) != reference_totals(packets):
+            print "ERROR: host totals differ from a parse of the whole packets"
+            sys.exit(1)
+        print "Host totals identical"
+
+
+if __name__ == '__main__':
+    main()